@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Script to compile the g-function JSON files in this directory into g_functions.bin, which is
+read (once per process) by HVACSizing.get_geothermal_loop_g_functions. Use --check to verify
+that g_functions.bin matches the JSON files without rewriting it.
+
+File format (little-endian):
+    'GFUN', uint32 version, uint32 number of tables
+    For each table (one per JSON file and number of boreholes):
+        uint8 name length, name (JSON filename), uint32 number of boreholes,
+        uint32 number of logtimes (n_t), uint32 number of heights (n_h),
+        float64[n_h] heights (m, ascending), float64[n_h] spacings B (m), float64[n_h] borehole radii (m),
+        float64[n_t] logtimes, float64[n_h * n_t] g-function values (one row per height)
+"""
+
+import os
+import sys
+import glob
+import json
+import struct
+import argparse
+
+MAGIC = b'GFUN'
+VERSION = 1
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+default_output = os.path.join(this_dir, 'g_functions.bin')
+
+
+def get_configurations(json_data):
+    """Get the configurations in a g-function JSON file, which are nested either one or two levels deep.
+
+    Returns:
+        A list of configuration dicts (with bore_locations, logtime, and g), in file order
+    """
+    configs = []
+    for values_1 in json_data.values():
+        if 'bore_locations' in values_1:
+            configs.append(values_1)
+        else:
+            for values_2 in values_1.values():
+                if 'bore_locations' in values_2:
+                    configs.append(values_2)
+    return configs
+
+
+def get_tables(json_path):
+    """Get the tables, keyed by number of boreholes, for a g-function JSON file.
+
+    The g-function values are keyed by 'B._H._rb' in the JSON; these are split into sorted height
+    axes with the corresponding spacing and borehole radius.
+    """
+    with open(json_path) as f:
+        json_data = json.load(f)
+
+    tables = {}
+    for config in get_configurations(json_data):
+        num_bores = len(config['bore_locations'])
+        if num_bores in tables:
+            continue  # The first configuration with a given number of boreholes is used
+
+        rows = []
+        for key, g in config['g'].items():
+            b, h, rb = (float(v) for v in key.split('._'))
+            rows.append((h, b, rb, [float(v) for v in g]))
+        rows.sort(key=lambda row: row[0])
+
+        tables[num_bores] = {'logtime': [float(v) for v in config['logtime']],
+                             'heights': [row[0] for row in rows],
+                             'spacings': [row[1] for row in rows],
+                             'radii': [row[2] for row in rows],
+                             'g': [row[3] for row in rows]}
+    return tables
+
+
+def get_library(json_dir):
+    """Get the tables for all g-function JSON files, keyed by (JSON filename, number of boreholes)."""
+    library = {}
+    for json_path in sorted(glob.glob(os.path.join(json_dir, '*.json'))):
+        name = os.path.basename(json_path)
+        for num_bores, table in sorted(get_tables(json_path).items()):
+            library[(name, num_bores)] = table
+    return library
+
+
+def write_library(library, output_path):
+    with open(output_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<II', VERSION, len(library)))
+        for (name, num_bores), table in library.items():
+            name = name.encode()
+            n_t = len(table['logtime'])
+            n_h = len(table['heights'])
+            if any(len(g) != n_t for g in table['g']):
+                raise ValueError(f"Inconsistent number of g-function values for {name.decode()} with {num_bores} boreholes.")
+            f.write(struct.pack('<B', len(name)) + name + struct.pack('<III', num_bores, n_t, n_h))
+            values = table['heights'] + table['spacings'] + table['radii'] + table['logtime'] + [v for g in table['g'] for v in g]
+            f.write(struct.pack(f'<{len(values)}d', *values))
+
+
+def read_library(input_path):
+    """Read g_functions.bin into the same structure as get_library."""
+    with open(input_path, 'rb') as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{input_path} is not a g-function library.")
+    version, n_tables = struct.unpack_from('<II', data, 4)
+    if version != VERSION:
+        raise ValueError(f"Unsupported g-function library version {version}.")
+
+    offset = 12
+    library = {}
+    for _ in range(n_tables):
+        name_len = data[offset]
+        name = data[offset + 1:offset + 1 + name_len].decode()
+        offset += 1 + name_len
+        num_bores, n_t, n_h = struct.unpack_from('<III', data, offset)
+        offset += 12
+        n_values = 3 * n_h + n_t + n_h * n_t
+        values = list(struct.unpack_from(f'<{n_values}d', data, offset))
+        offset += 8 * n_values
+        g = values[3 * n_h + n_t:]
+        library[(name, num_bores)] = {'logtime': values[3 * n_h:3 * n_h + n_t],
+                                      'heights': values[:n_h],
+                                      'spacings': values[n_h:2 * n_h],
+                                      'radii': values[2 * n_h:3 * n_h],
+                                      'g': [g[i * n_t:(i + 1) * n_t] for i in range(n_h)]}
+    if offset != len(data):
+        raise ValueError(f"Unexpected trailing data in {input_path}.")
+    return library
+
+
+def check_library(library, expected):
+    """Compare a compiled library to the one built from the JSON files.
+
+    Returns:
+        A list of error messages
+    """
+    errors = []
+    for key in sorted(set(library) | set(expected)):
+        name, num_bores = key
+        if key not in library:
+            errors.append(f"{name} with {num_bores} boreholes is missing from the compiled library.")
+        elif key not in expected:
+            errors.append(f"{name} with {num_bores} boreholes is not in the JSON files.")
+        elif library[key] != expected[key]:
+            fields = [field for field in expected[key] if library[key][field] != expected[key][field]]
+            errors.append(f"{name} with {num_bores} boreholes differs: {', '.join(fields)}.")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the g-function JSON files into g_functions.bin')
+    parser.add_argument('--check', action='store_true', help='Check that the compiled library matches the JSON files instead of writing it')
+    parser.add_argument('--output', default=default_output, help='Path of the compiled library (default: g_functions.bin in this directory)')
+    args = parser.parse_args()
+
+    expected = get_library(this_dir)
+
+    if args.check:
+        if not os.path.exists(args.output):
+            print(f"{args.output} not found; run build_g_functions.py to create it.")
+            sys.exit(1)
+        errors = check_library(read_library(args.output), expected)
+        if errors:
+            print("The compiled g-function library is out of date; run build_g_functions.py to update it.")
+            for error in errors:
+                print(f"  - {error}")
+            sys.exit(1)
+        print(f"{args.output} matches the {len(expected)} g-function tables in the JSON files.")
+        sys.exit(0)
+
+    write_library(expected, args.output)
+    print(f"Wrote {len(expected)} g-function tables to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
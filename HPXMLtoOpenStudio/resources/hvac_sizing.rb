@@ -3364,10 +3364,9 @@ module HVACSizing
       bore_config = HPXML::GeothermalLoopBorefieldConfigurationRectangle
     end
 
-    g_functions_json = get_geothermal_loop_g_functions_json(get_geothermal_loop_valid_configurations[bore_config])
-    valid_num_bores = get_geothermal_loop_valid_num_bores(g_functions_json)
+    g_functions = get_geothermal_loop_g_functions(bore_config)
 
-    unless valid_num_bores.include? num_bore_holes
+    unless g_functions.keys.include? num_bore_holes
       fail "Number of bore holes (#{num_bore_holes}) with borefield configuration '#{bore_config}' not supported."
     end
 
@@ -3376,7 +3375,7 @@ module HVACSizing
     hvac_sizings.GSHP_Bore_Holes = num_bore_holes
     hvac_sizings.GSHP_Bore_Config = bore_config
 
-    hvac_sizings.GSHP_G_Functions = get_geothermal_g_functions_data(bore_config, g_functions_json, geothermal_loop, num_bore_holes, bore_depth)
+    hvac_sizings.GSHP_G_Functions = get_geothermal_g_functions_data(g_functions[num_bore_holes], geothermal_loop, bore_depth)
   end
 
   # Calculates the total needed length of heating/cooling borehole length for the geothermal loop.
@@ -3439,100 +3438,38 @@ module HVACSizing
 
   # Returns the geothermal loop g-function response factors.
   #
-  # @param bore_config [String] Borefield configuration (HPXML::GeothermalLoopBorefieldConfigurationXXX)
-  # @param g_functions_json [JSON] JSON object with g-function data
+  # @param g_functions [Hash] G-function table for the borefield configuration and number of boreholes (see get_geothermal_loop_g_functions)
   # @param geothermal_loop [HPXML::GeothermalLoop] Geothermal loop of interest
-  # @param num_bore_holes [Integer] Total number of boreholes
   # @param bore_depth [Double] Depth of each borehole (ft)
   # @return [Array<Array<Double>, Array<Double>>] List of g-function lntts (natural log of time/steady state time) values, list of g-function values
-  def self.get_geothermal_g_functions_data(bore_config, g_functions_json, geothermal_loop, num_bore_holes, bore_depth)
+  def self.get_geothermal_g_functions_data(g_functions, geothermal_loop, bore_depth)
     actuals = { 'b' => UnitConversions.convert(geothermal_loop.bore_spacing, 'ft', 'm'),
                 'h' => UnitConversions.convert(bore_depth, 'ft', 'm'),
                 'rb' => UnitConversions.convert(geothermal_loop.bore_diameter / 2.0, 'in', 'm') }
     actuals['b_over_h'] = actuals['b'] / actuals['h']
 
-    g_library = { 24 => { 'b' => 5, 'd' => 2, 'rb' => 0.075 },
-                  48 => { 'b' => 5, 'd' => 2, 'rb' => 0.075 },
-                  96 => { 'b' => 5, 'd' => 2, 'rb' => 0.075 },
-                  192 => { 'b' => 5, 'd' => 2, 'rb' => 0.08 },
-                  384 => { 'b' => 5, 'd' => 2, 'rb' => 0.0875 } }
-    g_library.each do |h, b_d_rb|
-      g_library[h]['b_over_h'] = Float(b_d_rb['b']) / h
-      g_library[h]['rb_over_h'] = Float(b_d_rb['rb']) / h
-    end
-
-    [[24, 48], [48, 96], [96, 192], [192, 384]].each do |h1, h2|
+    heights = g_functions[:heights]
+    (heights.size - 1).times do |i|
+      h1 = heights[i]
+      h2 = heights[i + 1]
       next unless actuals['h'] >= h1 && actuals['h'] < h2
 
-      pt1 = g_library[h1]
-      pt2 = g_library[h2]
-
       # linear interpolation on "g" values
-      logtimes = []
-      gs = []
-      [h1, h2].each do |h|
-        b_d_rb = g_library[h]
-        b = b_d_rb['b']
-        rb = b_d_rb['rb']
-        b_h_rb = "#{b}._#{h}._#{rb}"
-
-        logtime, g = get_geothermal_loop_g_functions_data_from_json(g_functions_json, bore_config, num_bore_holes, b_h_rb)
-        logtimes << logtime
-        gs << g
-      end
       x = actuals['b_over_h']
-      x0 = pt1['b_over_h']
-      x1 = pt2['b_over_h']
-      g_functions = gs[0].zip(gs[1]).map { |v| MathTools.interp2(x, x0, x1, v[0], v[1]) }
+      x0 = g_functions[:spacings][i] / h1
+      x1 = g_functions[:spacings][i + 1] / h2
+      g_values = g_functions[:g][i].zip(g_functions[:g][i + 1]).map { |v| MathTools.interp2(x, x0, x1, v[0], v[1]) }
 
       # linear interpolation on rb/h for correction factor
-      x = actuals['b_over_h']
-      x0 = pt1['b_over_h']
-      x1 = pt2['b_over_h']
-      f0 = pt1['rb_over_h']
-      f1 = pt2['rb_over_h']
+      f0 = g_functions[:radii][i] / h1
+      f1 = g_functions[:radii][i + 1] / h2
       actuals['rb_over_h'] = MathTools.interp2(x, x0, x1, f0, f1)
       rb = actuals['rb_over_h'] * actuals['h']
       rb_actual_over_rb = actuals['rb'] / rb
       correction_factor = Math.log(rb_actual_over_rb)
-      g_functions = g_functions.map { |v| v - correction_factor }
+      g_values = g_values.map { |v| v - correction_factor }
 
-      return logtimes[0], g_functions
-    end
-  end
-
-  # Returns the geothermal loop g-function logtimes/values for a specific configuration in the JSON file.
-  #
-  # @param g_functions_json [JSON] JSON object with g-function data
-  # @param bore_config [String] Borefield configuration (HPXML::GeothermalLoopBorefieldConfigurationXXX)
-  # @param num_bore_holes [Integer] Total number of boreholes
-  # @param b_h_rb [String] The lookup key (B._H._rb) in the g-function data.
-  # @return [Array<Array<Double>, Array<Double>>] List of logtimes, list of g-function values
-  def self.get_geothermal_loop_g_functions_data_from_json(g_functions_json, bore_config, num_bore_holes, b_h_rb)
-    g_functions_json.values.each do |values_1|
-      if [HPXML::GeothermalLoopBorefieldConfigurationRectangle,
-          HPXML::GeothermalLoopBorefieldConfigurationL].include?(bore_config)
-        bore_locations = values_1[:bore_locations]
-        next if bore_locations.size != num_bore_holes
-
-        logtime = values_1[:logtime].map { |v| Float(v) }
-        g = values_1[:g][b_h_rb.to_sym].map { |v| Float(v) }
-
-        return logtime, g
-      elsif [HPXML::GeothermalLoopBorefieldConfigurationOpenRectangle,
-             HPXML::GeothermalLoopBorefieldConfigurationC,
-             HPXML::GeothermalLoopBorefieldConfigurationLopsidedU,
-             HPXML::GeothermalLoopBorefieldConfigurationU].include?(bore_config)
-        values_1.values.each do |values_2|
-          bore_locations = values_2[:bore_locations]
-          next if bore_locations.size != num_bore_holes
-
-          logtime = values_2[:logtime].map { |v| Float(v) }
-          g = values_2[:g][b_h_rb.to_sym].map { |v| Float(v) }
-
-          return logtime, g
-        end
-      end
+      return g_functions[:logtime], g_values
     end
   end
 
@@ -3549,37 +3486,49 @@ module HVACSizing
     return valid_configs
   end
 
-  # Returns the g-function data for a given geothermal loop configuration.
+  # Returns the g-function tables for a given geothermal loop configuration. The tables are compiled
+  # from the g-function data files into data/g_functions/g_functions.bin (by build_g_functions.py) and
+  # are only read once per process.
   #
-  # @param g_functions_filename [String] G-function data filename
-  # @return [JSON] JSON object with g-function data
-  def self.get_geothermal_loop_g_functions_json(g_functions_filename)
-    require 'json'
-
-    g_functions_filepath = File.join(File.dirname(__FILE__), 'data/g_functions', g_functions_filename)
-    g_functions_json = JSON.parse(File.read(g_functions_filepath), symbolize_names: true)
-    return g_functions_json
+  # @param bore_config [String] Borefield configuration (HPXML::GeothermalLoopBorefieldConfigurationXXX)
+  # @return [Hash] Map of number of boreholes => table (logtime, ascending heights (m) with their spacings (m), radii (m), and g-function values)
+  def self.get_geothermal_loop_g_functions(bore_config)
+    @g_functions_library ||= read_geothermal_loop_g_functions_library(File.join(File.dirname(__FILE__), 'data/g_functions/g_functions.bin'))
+    return @g_functions_library[get_geothermal_loop_valid_configurations[bore_config]]
   end
 
-  # Returns the valid number of boreholes for a given geothermal loop configuration.
+  # Reads the compiled g-function library; see data/g_functions/build_g_functions.py for the file format.
   #
-  # @param g_functions_json [JSON] JSON object with g-function data
-  # @return [Array<Integer>] List of valid numbers of boreholes
-  def self.get_geothermal_loop_valid_num_bores(g_functions_json)
-    valid_num_bores = []
-    g_functions_json.each do |_key_1, values_1|
-      if values_1.keys.include?(:bore_locations)
-        valid_num_bores << values_1[:bore_locations].size
-      else
-        values_1.each do |_key_2, values_2|
-          if values_2.keys.include?(:bore_locations)
-            valid_num_bores << values_2[:bore_locations].size
-          end
-        end
-      end
-    end
-
-    return valid_num_bores
+  # @param g_functions_filepath [String] Path to the compiled g-function library
+  # @return [Hash] Map of g-function data filename => (number of boreholes => table)
+  def self.read_geothermal_loop_g_functions_library(g_functions_filepath)
+    data = File.binread(g_functions_filepath)
+    magic, version, n_tables = data.unpack('a4VV')
+    if magic != 'GFUN' || version != 1
+      fail "Unexpected g-function library format: #{g_functions_filepath}."
+    end
+
+    library = {}
+    offset = 12
+    n_tables.times do
+      name_len = data.getbyte(offset)
+      name = data.byteslice(offset + 1, name_len)
+      offset += 1 + name_len
+      num_bores, n_t, n_h = data.byteslice(offset, 12).unpack('VVV')
+      offset += 12
+      n_values = 3 * n_h + n_t + n_h * n_t
+      values = data.byteslice(offset, 8 * n_values).unpack("E#{n_values}")
+      offset += 8 * n_values
+
+      library[name] = {} if library[name].nil?
+      library[name][num_bores] = { heights: values[0, n_h],
+                                   spacings: values[n_h, n_h],
+                                   radii: values[2 * n_h, n_h],
+                                   logtime: values[3 * n_h, n_t],
+                                   g: values[3 * n_h + n_t, n_h * n_t].each_slice(n_t).to_a }
+    end
+
+    return library
   end
 
   # Calculates the heat pump's heating capacity at the specified outdoor/indoor temperatures, as a fraction
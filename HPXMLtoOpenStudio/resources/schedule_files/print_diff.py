@@ -3,14 +3,37 @@
 Script to print detailed differences between schedule CSV files in git.
 Compares the current state of files on disk with the committed versions.
 Returns exit code 1 if differences are found, 0 otherwise.
+
+With --history or --bisect, reports the commits that changed schedule columns instead, using
+an index of per-column digests and statistics for every historical version of each file.
 """
 
+import io
 import os
+import json
+import contextlib
+import math
+import hashlib
+import datetime
 import subprocess
 import pandas as pd
 import sys
 import argparse
 
+class NoProfiler:
+    """Stand-in for workflow/tests/profiler.py's Profiler when profiling is off, so that it is only imported
+    (from the tests folder) when requested."""
+    enabled = False
+
+    def file(self, file):
+        return contextlib.nullcontext()
+
+    def phase(self, file, phase):
+        return contextlib.nullcontext()
+
+    def write(self, json_path, stats_path=None):
+        pass
+
 def get_git_tracked_csv_files():
     """Get all tracked CSV files in the current directory."""
     result = subprocess.run(
@@ -114,7 +137,7 @@ def plot_daily_profiles(avg_profile_git, avg_profile_current, column_name, outpu
         plt.close()
         return None
 
-def compare_csv_files(file_path, branch=None, plot_profiles=False, output_dir=None):
+def compare_csv_files(file_path, branch=None, plot_profiles=False, output_dir=None, profiler=None):
     """Compare a CSV file on disk with its version in git.
 
     Args:
@@ -122,7 +145,10 @@ def compare_csv_files(file_path, branch=None, plot_profiles=False, output_dir=No
         branch: Optional branch name to compare against
         plot_profiles: Whether to generate plots for profile comparisons
         output_dir: Directory to save plots if plot_profiles is True
+        profiler: Optional Profiler (from workflow/tests/profiler.py) to record timings with
     """
+    profiler = profiler if profiler else NoProfiler()
+
     # Get the directory of the script
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -139,166 +165,433 @@ def compare_csv_files(file_path, branch=None, plot_profiles=False, output_dir=No
 
     rel_path = os.path.relpath(full_path, git_root)
 
-    # Read the current file from disk
-    try:
-        df_current = pd.read_csv(full_path)
-    except Exception as e:
-        return f"Error reading current file {file_path}: {str(e)}"
+    with profiler.phase(file_path, 'read'):
+        # Read the current file from disk
+        try:
+            df_current = pd.read_csv(full_path)
+        except Exception as e:
+            return f"Error reading current file {file_path}: {str(e)}"
 
-    # Get the file content from git
-    git_content = get_file_from_git(rel_path, branch)
-    if not git_content:
-        return f"File {file_path} not found in {'branch ' + branch if branch else 'git'}"
+        # Get the file content from git
+        git_content = get_file_from_git(rel_path, branch)
+        if not git_content:
+            return f"File {file_path} not found in {'branch ' + branch if branch else 'git'}"
 
-    # Write git content to a temporary file and read it
-    temp_file = os.path.join(script_dir, "temp_git_file.csv")
-    with open(temp_file, "w") as f:
-        f.write(git_content)
+        # Write git content to a temporary file and read it
+        temp_file = os.path.join(script_dir, "temp_git_file.csv")
+        with open(temp_file, "w") as f:
+            f.write(git_content)
 
-    try:
-        df_git = pd.read_csv(temp_file)
-        os.remove(temp_file)  # Clean up
-    except Exception as e:
-        if os.path.exists(temp_file):
+        try:
+            df_git = pd.read_csv(temp_file)
             os.remove(temp_file)  # Clean up
-        return f"Error reading git version of {file_path}: {str(e)}"
-
-    # Compare the dataframes
-    if df_current.equals(df_git):
-        return None  # No differences
+        except Exception as e:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)  # Clean up
+            return f"Error reading git version of {file_path}: {str(e)}"
 
-    # Check for shape differences
-    shape_changed = df_current.shape != df_git.shape
+    return compare_dataframes(file_path, df_git, df_current, branch, plot_profiles, output_dir, profiler)
 
-    # Find changed and unchanged columns
-    changed_columns = []
-    unchanged_columns = []
-    all_columns = set(df_current.columns) | set(df_git.columns)
+def compare_dataframes(file_path, df_git, df_current, branch=None, plot_profiles=False, output_dir=None, profiler=None):
+    """Compare the git and current versions of a CSV file's contents.
 
-    for col in all_columns:
-        if col not in df_current.columns:
-            changed_columns.append((col, "Column removed", None))
-            continue
-        if col not in df_git.columns:
-            changed_columns.append((col, "Column added", None))
-            continue
+    Args:
+        file_path: Path to the file (used for reporting)
+        df_git: DataFrame of the git version of the file
+        df_current: DataFrame of the current version of the file
+        branch: Optional branch name being compared against (used for reporting)
+        plot_profiles: Whether to generate plots for profile comparisons
+        output_dir: Directory to save plots if plot_profiles is True
+        profiler: Optional Profiler (from workflow/tests/profiler.py) to record timings with
 
-        # Check if column values are different
-        if not df_current[col].equals(df_git[col]):
-            # Calculate sum for numeric columns
-            if pd.api.types.is_numeric_dtype(df_current[col]) and pd.api.types.is_numeric_dtype(df_git[col]):
-                sum_git = df_git[col].sum()
-                sum_current = df_current[col].sum()
-
-                # Count non-zero values
-                nonzero_git = (df_git[col] != 0).sum()
-                nonzero_current = (df_current[col] != 0).sum()
-
-                # Calculate average daily profile
-                avg_profile_git = calculate_avg_daily_profile(df_git[col])
-                avg_profile_current = calculate_avg_daily_profile(df_current[col])
-
-                # Display before and after profiles
-                profile_diff = ""
-                if avg_profile_git is not None and avg_profile_current is not None:
-                    before_values = [f"{val:.2f}" for val in avg_profile_git]
-                    after_values = [f"{val:.2f}" for val in avg_profile_current]
-
-                    profile_diff = f"      daily average profile (24 hourly values):\n"
-                    profile_diff += f"       before: [{', '.join(before_values)}]\n"
-                    profile_diff += f"       after:  [{', '.join(after_values)}]"
-
-                # Get sample of changed values
-                diff_mask = df_current[col] != df_git[col]
-                if diff_mask.any():
-                    sample_indices = diff_mask.to_numpy().nonzero()[0][:2]  # Get up to 2 changed indices
-                    sample_changes = []
-                    for idx in sample_indices:
-                        if idx < len(df_git) and idx < len(df_current):
-                            sample_changes.append(f"row {idx}: {df_git.iloc[idx][col]} -> {df_current.iloc[idx][col]}")
-
-                    changed_columns.append((
-                        col, 
-                        f"total: {sum_git:.2f} -> {sum_current:.2f}\n      non-zero values: {nonzero_git} -> {nonzero_current}\n{profile_diff}",
-                        sample_changes
-                    ))
+    Returns:
+        A string describing the differences, or None if there are no differences
+    """
+    profiler = profiler if profiler else NoProfiler()
+
+    with profiler.phase(file_path, 'diff'):
+        # Compare the dataframes
+        if df_current.equals(df_git):
+            return None  # No differences
+
+        # Check for shape differences
+        shape_changed = df_current.shape != df_git.shape
+
+        # Find changed and unchanged columns
+        changed_columns = []
+        unchanged_columns = []
+        all_columns = set(df_current.columns) | set(df_git.columns)
+
+        for col in all_columns:
+            if col not in df_current.columns:
+                changed_columns.append((col, "Column removed", None))
+                continue
+            if col not in df_git.columns:
+                changed_columns.append((col, "Column added", None))
+                continue
+
+            # Check if column values are different
+            if not df_current[col].equals(df_git[col]):
+                # Calculate sum for numeric columns
+                if pd.api.types.is_numeric_dtype(df_current[col]) and pd.api.types.is_numeric_dtype(df_git[col]):
+                    sum_git = df_git[col].sum()
+                    sum_current = df_current[col].sum()
+
+                    # Count non-zero values
+                    nonzero_git = (df_git[col] != 0).sum()
+                    nonzero_current = (df_current[col] != 0).sum()
+
+                    # Calculate average daily profile
+                    avg_profile_git = calculate_avg_daily_profile(df_git[col])
+                    avg_profile_current = calculate_avg_daily_profile(df_current[col])
+
+                    # Display before and after profiles
+                    profile_diff = ""
+                    if avg_profile_git is not None and avg_profile_current is not None:
+                        before_values = [f"{val:.2f}" for val in avg_profile_git]
+                        after_values = [f"{val:.2f}" for val in avg_profile_current]
+
+                        profile_diff = f"      daily average profile (24 hourly values):\n"
+                        profile_diff += f"       before: [{', '.join(before_values)}]\n"
+                        profile_diff += f"       after:  [{', '.join(after_values)}]"
+
+                    # Get sample of changed values
+                    diff_mask = df_current[col] != df_git[col]
+                    if diff_mask.any():
+                        sample_indices = diff_mask.to_numpy().nonzero()[0][:2]  # Get up to 2 changed indices
+                        sample_changes = []
+                        for idx in sample_indices:
+                            if idx < len(df_git) and idx < len(df_current):
+                                sample_changes.append(f"row {idx}: {df_git.iloc[idx][col]} -> {df_current.iloc[idx][col]}")
+
+                        changed_columns.append((
+                            col, 
+                            f"total: {sum_git:.2f} -> {sum_current:.2f}\n      non-zero values: {nonzero_git} -> {nonzero_current}\n{profile_diff}",
+                            sample_changes
+                        ))
+                    else:
+                        changed_columns.append((col, f"total: {sum_git:.2f} -> {sum_current:.2f}\nnon-zero values: {nonzero_git} -> {nonzero_current}", None))
                 else:
-                    changed_columns.append((col, f"total: {sum_git:.2f} -> {sum_current:.2f}\nnon-zero values: {nonzero_git} -> {nonzero_current}", None))
+                    # For non-numeric columns, show a few examples of changes
+                    diff_mask = df_current[col] != df_git[col]
+                    if diff_mask.any():
+                        sample_indices = diff_mask.to_numpy().nonzero()[0][:2]  # Get up to 2 changed indices
+                        sample_changes = []
+                        for idx in sample_indices:
+                            if idx < len(df_git) and idx < len(df_current):
+                                sample_changes.append(f"row {idx}: '{df_git.iloc[idx][col]}' -> '{df_current.iloc[idx][col]}'")
+
+                        changed_columns.append((col, "Values changed", sample_changes))
+                    else:
+                        changed_columns.append((col, "Values changed", None))
             else:
-                # For non-numeric columns, show a few examples of changes
-                diff_mask = df_current[col] != df_git[col]
-                if diff_mask.any():
-                    sample_indices = diff_mask.to_numpy().nonzero()[0][:2]  # Get up to 2 changed indices
-                    sample_changes = []
-                    for idx in sample_indices:
-                        if idx < len(df_git) and idx < len(df_current):
-                            sample_changes.append(f"row {idx}: '{df_git.iloc[idx][col]}' -> '{df_current.iloc[idx][col]}'")
-
-                    changed_columns.append((col, "Values changed", sample_changes))
-                else:
-                    changed_columns.append((col, "Values changed", None))
-        else:
-            unchanged_columns.append(col)
-
-    # Format the output
-    result = []
-    result.append("=" * 80)
-    result.append(f"FILE: {os.path.basename(file_path)}")
-    if branch:
-        result.append(f"COMPARING: Current state vs branch '{branch}'")
-    result.append("=" * 80)
-
-    # Add summary section
-    result.append("SUMMARY:")
-    result.append(f"  - {len(changed_columns)} columns changed, {len(unchanged_columns)} columns unchanged")
-    if shape_changed:
-        result.append(f"  - Rows: {len(df_git)} -> {len(df_current)}")
-    result.append("")
-
-    # List unchanged columns
-    if unchanged_columns:
-        result.append("UNCHANGED COLUMNS:")
-        # Format in multiple rows if there are many columns
-        chunks = [sorted(unchanged_columns)[i:i+5] for i in range(0, len(unchanged_columns), 5)]
-        for chunk in chunks:
-            result.append(f"  {', '.join(chunk)}")
+                unchanged_columns.append(col)
+
+    with profiler.phase(file_path, 'render'):
+        # Format the output
+        result = []
+        result.append("=" * 80)
+        result.append(f"FILE: {os.path.basename(file_path)}")
+        if branch:
+            result.append(f"COMPARING: Current state vs branch '{branch}'")
+        result.append("=" * 80)
+
+        # Add summary section
+        result.append("SUMMARY:")
+        result.append(f"  - {len(changed_columns)} columns changed, {len(unchanged_columns)} columns unchanged")
+        if shape_changed:
+            result.append(f"  - Rows: {len(df_git)} -> {len(df_current)}")
         result.append("")
 
-    # List changed columns with details
-    if changed_columns:
-        result.append("CHANGED COLUMNS:")
-
-        for i, (col, change, samples) in enumerate(changed_columns):
-            result.append(f"  - {col}:")
-            result.append(f"      {change}")
-
-            # Generate plot for this column if requested and it has profile data
-            if plot_profiles and 'daily average profile' in change:
-                # Extract profiles from the existing data
-                avg_profile_git = calculate_avg_daily_profile(df_git[col])
-                avg_profile_current = calculate_avg_daily_profile(df_current[col])
-
-                if avg_profile_git is not None and avg_profile_current is not None:
-                    plot_path = plot_daily_profiles(
-                        avg_profile_git,
-                        avg_profile_current,
-                        f"{os.path.basename(file_path)}: {col}",
-                        output_dir
-                    )
-                    if plot_path:
-                        result.append(f"      Plot saved to: {plot_path}")
-
-            if samples:
-                result.append(f"      Sample changes:")
-                for sample in samples:
-                    result.append(f"        - {sample}")
-
-            # Add a blank line between columns except after the last one
-            if i < len(changed_columns) - 1:
-                result.append("")
+        # List unchanged columns
+        if unchanged_columns:
+            result.append("UNCHANGED COLUMNS:")
+            # Format in multiple rows if there are many columns
+            chunks = [sorted(unchanged_columns)[i:i+5] for i in range(0, len(unchanged_columns), 5)]
+            for chunk in chunks:
+                result.append(f"  {', '.join(chunk)}")
+            result.append("")
+
+        # List changed columns with details
+        if changed_columns:
+            result.append("CHANGED COLUMNS:")
+
+            for i, (col, change, samples) in enumerate(changed_columns):
+                result.append(f"  - {col}:")
+                result.append(f"      {change}")
+
+                # Generate plot for this column if requested and it has profile data
+                if plot_profiles and 'daily average profile' in change:
+                    # Extract profiles from the existing data
+                    avg_profile_git = calculate_avg_daily_profile(df_git[col])
+                    avg_profile_current = calculate_avg_daily_profile(df_current[col])
+
+                    if avg_profile_git is not None and avg_profile_current is not None:
+                        plot_path = plot_daily_profiles(
+                            avg_profile_git,
+                            avg_profile_current,
+                            f"{os.path.basename(file_path)}: {col}",
+                            output_dir
+                        )
+                        if plot_path:
+                            result.append(f"      Plot saved to: {plot_path}")
+
+                if samples:
+                    result.append(f"      Sample changes:")
+                    for sample in samples:
+                        result.append(f"        - {sample}")
+
+                # Add a blank line between columns except after the last one
+                if i < len(changed_columns) - 1:
+                    result.append("")
 
     return "\n".join(result)
 
+HISTORY_STATS = ['digest', 'total', 'nonzero', 'profile']
+
+def get_default_index_file():
+    """Get the default path of the history index, inside the git directory so it is never committed."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    git_dir = subprocess.run(
+        ["git", "rev-parse", "--absolute-git-dir"],
+        capture_output=True,
+        text=True,
+        cwd=script_dir
+    ).stdout.strip()
+    return os.path.join(git_dir, "schedule_history_index.json")
+
+def is_valid_git_ref(ref):
+    """Check whether a ref (e.g., branch, tag, or commit) resolves to a commit."""
+    result = subprocess.run(
+        ["git", "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    return result.returncode == 0
+
+def get_csv_history(ref="HEAD", since=None):
+    """Get the first-parent history of the schedule CSV files.
+
+    Args:
+        ref: Ref whose history to get
+        since: Optional ref; if provided, only commits after it (i.e., since..ref) are included
+
+    Returns:
+        A list of (commit, timestamp, {file name: blob hash, or None if deleted}) tuples, oldest first
+    """
+    rev_range = f"{since}..{ref}" if since else ref
+    result = subprocess.run(
+        ["git", "log", "--first-parent", "-m", "--reverse", "--format=commit %H %ct", "--raw", "--no-abbrev",
+         "--no-renames", rev_range, "--", "*.csv"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    history = []
+    for line in result.stdout.splitlines():
+        if line.startswith("commit "):
+            _, commit, timestamp = line.split()
+            history.append((commit, int(timestamp), {}))
+        elif line.startswith(":"):
+            info, path = line.split("\t", 1)
+            _, _, _, blob, status = info.split()
+            history[-1][2][os.path.basename(path)] = None if status == "D" else blob
+    return history
+
+def get_csv_blobs_at(ref):
+    """Get the blob hashes of the schedule CSV files at a ref.
+
+    Returns:
+        A dict of file name to blob hash
+    """
+    result = subprocess.run(
+        ["git", "ls-tree", ref],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    blobs = {}
+    for line in result.stdout.splitlines():
+        info, path = line.split("\t", 1)
+        if path.endswith(".csv"):
+            blobs[os.path.basename(path)] = info.split()[2]
+    return blobs
+
+def read_git_blobs(blobs):
+    """Read blobs from git using a single `git cat-file --batch` process.
+
+    Args:
+        blobs: Iterable of blob hashes
+
+    Yields:
+        (blob hash, content bytes) tuples
+    """
+    process = subprocess.Popen(
+        ["git", "cat-file", "--batch"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    try:
+        for blob in blobs:
+            process.stdin.write(f"{blob}\n".encode())
+            process.stdin.flush()
+            header = process.stdout.readline().decode().split()
+            if len(header) < 3:  # "<blob> missing"
+                continue
+            content = process.stdout.read(int(header[2]))
+            process.stdout.read(1)  # Trailing newline
+            yield blob, content
+    finally:
+        process.stdin.close()
+        process.wait()
+
+def get_column_stats(series):
+    """Get the digest and summary statistics of a schedule column.
+
+    Returns:
+        A dict with the digest, total, non-zero count, and 24-hour average profile (numeric columns only)
+    """
+    values = series.to_numpy()
+    if pd.api.types.is_numeric_dtype(series):
+        stats = {"digest": hashlib.sha1(values.astype(float).tobytes()).hexdigest(),
+                 "total": float(values.sum()),
+                 "nonzero": int((values != 0).sum())}
+        profile = calculate_avg_daily_profile(series)
+        stats["profile"] = None if profile is None else [round(float(v), 6) for v in profile]
+        return stats
+    return {"digest": hashlib.sha1("\n".join(map(str, values)).encode()).hexdigest(),
+            "total": None,
+            "nonzero": None,
+            "profile": None}
+
+def load_history_index(index_file):
+    """Load the history index, a dict of blob hash to {column: stats}, keyed by content so it never goes stale."""
+    if not os.path.exists(index_file):
+        return {}
+    with open(index_file) as f:
+        return json.load(f)
+
+def update_history_index(index, blobs, index_file=None):
+    """Add any blobs that aren't yet in the index, reading them via a single git process.
+
+    Args:
+        index: Dict of blob hash to {column: stats}
+        blobs: Iterable of blob hashes
+        index_file: Optional path to save the index to if updated
+
+    Returns:
+        The number of blobs added
+    """
+    new_blobs = sorted(set(blob for blob in blobs if blob and blob not in index))
+    for blob, content in read_git_blobs(new_blobs):
+        try:
+            df = pd.read_csv(io.BytesIO(content))
+        except Exception:
+            index[blob] = {}
+            continue
+        index[blob] = {col: get_column_stats(df[col]) for col in df.columns}
+    if new_blobs and index_file:
+        with open(index_file, "w") as f:
+            json.dump(index, f)
+    return len(new_blobs)
+
+def stat_changed(before, after, stat):
+    """Check whether a column's stat changed between two versions (None means the column doesn't exist)."""
+    if before is None or after is None:
+        return before is not after
+    if stat == "digest":
+        return before["digest"] != after["digest"]
+    value_before, value_after = before[stat], after[stat]
+    if value_before is None or value_after is None:
+        return value_before is not value_after
+    if stat == "profile":
+        return len(value_before) != len(value_after) or any(not math.isclose(a, b, abs_tol=1e-6) for a, b in zip(value_before, value_after))
+    return not math.isclose(value_before, value_after, rel_tol=1e-9, abs_tol=1e-9)
+
+def format_stat(stats, stat):
+    if stats is None:
+        return "(none)"
+    if stat == "digest":
+        return stats["digest"][:10]
+    if stat == "total":
+        return "n/a" if stats["total"] is None else f"{stats['total']:.2f}"
+    if stat == "nonzero":
+        return "n/a" if stats["nonzero"] is None else str(stats["nonzero"])
+    if stats["profile"] is None:
+        return "n/a"
+    return f"[{', '.join(f'{v:.2f}' for v in stats['profile'])}]"
+
+def get_column_changes(index, history, start_blobs=None, column=None, file_name=None, stat="digest"):
+    """Get the commits in a history that changed schedule columns, using only the history index.
+
+    Args:
+        index: Dict of blob hash to {column: stats}
+        history: Output of get_csv_history
+        start_blobs: Dict of file name to blob hash before the first commit in history (default: no files)
+        column: Optional column name to restrict to
+        file_name: Optional file name to restrict to
+        stat: Stat that defines a change ('digest', 'total', 'nonzero', or 'profile')
+
+    Returns:
+        A list of (commit, timestamp, file name, column, stats before, stats after) tuples, oldest first
+    """
+    current = dict(start_blobs or {})
+    changes = []
+    for commit, timestamp, files in history:
+        for name, blob in sorted(files.items()):
+            before_blob = current.get(name)
+            current[name] = blob
+            if file_name and name != file_name:
+                continue
+            before = index.get(before_blob, {}) if before_blob else {}
+            after = index.get(blob, {}) if blob else {}
+            columns = [column] if column else sorted(set(before) | set(after))
+            for col in columns:
+                if stat_changed(before.get(col), after.get(col), stat):
+                    changes.append((commit, timestamp, name, col, before.get(col), after.get(col)))
+    return changes
+
+def print_history(index_file, ref=None, bisect=None, column=None, file_name=None, stat="digest"):
+    """Print the commits that changed schedule columns, or the first such commit between two refs.
+
+    Args:
+        index_file: Path of the history index
+        ref: Ref whose history to search (default: HEAD)
+        bisect: Optional (good, bad) refs; if provided, report the first change after good up to bad
+        column: Optional column name to restrict to
+        file_name: Optional file name to restrict to
+        stat: Stat that defines a change ('digest', 'total', 'nonzero', or 'profile')
+    """
+    index = load_history_index(index_file)
+    start_blobs = {}
+    if bisect:
+        good, bad = bisect
+        history = get_csv_history(bad, since=good)
+        start_blobs = get_csv_blobs_at(good)
+    else:
+        history = get_csv_history(ref or "HEAD")
+    blobs = list(start_blobs.values()) + [blob for _, _, files in history for blob in files.values()]
+    n_new = update_history_index(index, blobs, index_file)
+    if n_new:
+        print(f"Indexed {n_new} new schedule file versions in {index_file}.")
+
+    changes = get_column_changes(index, history, start_blobs, column, file_name, stat)
+    if bisect:
+        changes = changes[:1]
+        if not changes:
+            print(f"No changes to {column or 'schedule columns'} between {good} and {bad}.")
+            return
+        print(f"First commit after {good} that changed {column or 'schedule columns'}:")
+
+    for commit, timestamp, name, col, before, after in changes:
+        date = datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+        print(f"{commit[:10]} {date} {name}: {col}")
+        print(f"      {stat}: {format_stat(before, stat)} -> {format_stat(after, stat)}")
+
 def main():
     """Main function to compare all CSV files."""
     # Parse command line arguments
@@ -306,8 +599,26 @@ def main():
     parser.add_argument('--with', dest='branch', help='Compare with specified branch instead of HEAD')
     parser.add_argument('--plot', action='store_true', help='Generate plots for daily profile comparisons')
     parser.add_argument('--output-dir', default='profile_plots', help='Directory to save plots (default: profile_plots)')
+    parser.add_argument('--profile', action='store_true', help='Write per-file/per-phase timings and peak RSS to print_diff_profile.json in the output directory')
+    parser.add_argument('--profile-stats', action='store_true', help='Also write cProfile stats for the slowest file to print_diff_profile.pstats')
+    parser.add_argument('--profile-memory', action='store_true', help='Also trace the peak allocated memory per file/phase (slows down the run, so timings are inflated)')
+    parser.add_argument('--history', action='store_true', help='List the commits (in the history of --with, default HEAD) that changed schedule columns, using the history index')
+    parser.add_argument('--bisect', nargs=2, metavar=('GOOD', 'BAD'), help='Find the first commit after GOOD up to BAD that changed schedule columns, using the history index')
+    parser.add_argument('--column', help='Restrict --history/--bisect to a column (e.g., hot_water_fixtures)')
+    parser.add_argument('--file', dest='file_name', help='Restrict --history/--bisect to a schedule file name')
+    parser.add_argument('--stat', default='digest', choices=HISTORY_STATS, help='Change detected by --history/--bisect (default: digest, i.e. any value change)')
+    parser.add_argument('--index-file', help='Path of the history index (default: schedule_history_index.json in the git directory)')
     args = parser.parse_args()
 
+    if args.history or args.bisect:
+        refs = args.bisect or [args.branch or "HEAD"]
+        invalid_refs = [ref for ref in refs if not is_valid_git_ref(ref)]
+        if invalid_refs:
+            print(f"Error: {', '.join(invalid_refs)} is not a valid git ref.")
+            sys.exit(2)
+        print_history(args.index_file or get_default_index_file(), args.branch, args.bisect, args.column, args.file_name, args.stat)
+        sys.exit(0)
+
     # Import matplotlib only if plotting is enabled
     if args.plot:
         try:
@@ -326,16 +637,30 @@ def main():
         output_dir = os.path.join(script_dir, args.output_dir)
         os.makedirs(output_dir, exist_ok=True)
 
+    # Import the profiler (from workflow/tests) only if profiling is enabled
+    profiler = NoProfiler()
+    if args.profile or args.profile_stats or args.profile_memory:
+        sys.path.insert(0, os.path.join(script_dir, '..', '..', '..', 'workflow', 'tests'))
+        from profiler import Profiler
+        profiler = Profiler(cprofile=args.profile_stats, trace_memory=args.profile_memory)
+
     # Get all tracked CSV files
     csv_files = get_git_tracked_csv_files()
 
     # Check if any files have changed
     changed_files = []
     for file_path in csv_files:
-        diff_result = compare_csv_files(file_path, args.branch, args.plot, output_dir)
+        with profiler.file(file_path):
+            diff_result = compare_csv_files(file_path, args.branch, args.plot, output_dir, profiler)
         if diff_result:
             changed_files.append(diff_result)
 
+    if profiler.enabled:
+        profile_dir = os.path.join(script_dir, args.output_dir)
+        os.makedirs(profile_dir, exist_ok=True)
+        profiler.write(os.path.join(profile_dir, 'print_diff_profile.json'),
+                       os.path.join(profile_dir, 'print_diff_profile.pstats'))
+
     if changed_files:
         print("Schedule files that changed:")
         if args.branch:
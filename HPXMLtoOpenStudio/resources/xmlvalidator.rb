@@ -7,9 +7,22 @@ module XMLValidator
   # @param schema_or_schematron_path [String] Path to the XSD schema or Schematron file
   # @return [OpenStudio::XMLValidator] OpenStudio XMLValidator object
   def self.get_xml_validator(schema_or_schematron_path)
+    if not @cache.nil?
+      return @cache[File.expand_path(schema_or_schematron_path)] ||= OpenStudio::XMLValidator.new(schema_or_schematron_path)
+    end
+
     return OpenStudio::XMLValidator.new(schema_or_schematron_path)
   end
 
+  # Enables reuse of the OpenStudio::XMLValidator objects returned by get_xml_validator, so
+  # that a long-lived process (e.g., run_simulation.rb --worker) only loads each XSD schema
+  # or Schematron file once. Not for use when validating from multiple threads.
+  #
+  # @return [nil]
+  def self.enable_cache
+    @cache = {}
+  end
+
   # Validates an HPXML file against a XSD schema file.
   #
   # @param hpxml_path [String] Path to the HPXML file
@@ -1840,14 +1840,13 @@ class HPXMLtoOpenStudioHVACSizingTest < Minitest::Test
     bore_config = HPXML::GeothermalLoopBorefieldConfigurationRectangle
     num_bore_holes = 40
     bore_depth = UnitConversions.convert(150.0, 'm', 'ft')
-    g_functions_filename = HVACSizing.get_geothermal_loop_valid_configurations[bore_config]
-    g_functions_json = HVACSizing.get_geothermal_loop_g_functions_json(g_functions_filename)
+    g_functions = HVACSizing.get_geothermal_loop_g_functions(bore_config)
 
     geothermal_loop = HPXML::GeothermalLoop.new(nil)
     geothermal_loop.bore_spacing = UnitConversions.convert(7.0, 'm', 'ft')
     geothermal_loop.bore_diameter = UnitConversions.convert(80.0 * 2, 'mm', 'in')
 
-    actual_lntts, actual_gfnc_coeff = HVACSizing.get_geothermal_g_functions_data(bore_config, g_functions_json, geothermal_loop, num_bore_holes, bore_depth)
+    actual_lntts, actual_gfnc_coeff = HVACSizing.get_geothermal_g_functions_data(g_functions[num_bore_holes], geothermal_loop, bore_depth)
 
     expected_lntts = [-8.5, -7.8, -7.2, -6.5, -5.9, -5.2, -4.5, -3.963, -3.27, -2.864, -2.577, -2.171, -1.884, -1.191, -0.497, -0.274, -0.051, 0.196, 0.419, 0.642, 0.873, 1.112, 1.335, 1.679, 2.028, 2.275, 3.003]
     expected_gfnc_coeff = [2.619, 2.967, 3.279, 3.700, 4.190, 5.107, 6.680, 8.537, 11.991, 14.633, 16.767, 20.083, 22.593, 28.734, 34.345, 35.927, 37.342, 38.715, 39.768, 40.664, 41.426, 42.056, 42.524, 43.054, 43.416, 43.594, 43.885]
@@ -1869,10 +1868,29 @@ class HPXMLtoOpenStudioHVACSizingTest < Minitest::Test
                       HPXML::GeothermalLoopBorefieldConfigurationLopsidedU => [6, 7, 8, 9, 10] }
 
     valid_configs.each do |bore_config, valid_num_bores|
-      g_functions_filename = HVACSizing.get_geothermal_loop_valid_configurations[bore_config]
-      g_functions_json = HVACSizing.get_geothermal_loop_g_functions_json(g_functions_filename)
+      g_functions = HVACSizing.get_geothermal_loop_g_functions(bore_config)
       valid_num_bores.each do |num_bore_holes|
-        HVACSizing.get_geothermal_loop_g_functions_data_from_json(g_functions_json, bore_config, num_bore_holes, '5._192._0.08') # b_h_rb is arbitrary
+        assert(g_functions.keys.include?(num_bore_holes))
+      end
+    end
+  end
+
+  def test_gshp_g_function_library_matches_json
+    # Check that data/g_functions/g_functions.bin is up to date; if not, run build_g_functions.py
+    g_functions_dir = File.join(File.dirname(__FILE__), '..', 'resources', 'data', 'g_functions')
+    HVACSizing.get_geothermal_loop_valid_configurations.each do |bore_config, g_functions_filename|
+      g_functions = HVACSizing.get_geothermal_loop_g_functions(bore_config)
+      json = JSON.parse(File.read(File.join(g_functions_dir, g_functions_filename)))
+      json.values.each do |values_1|
+        (values_1.key?('bore_locations') ? [values_1] : values_1.values).each do |values_2|
+          table = g_functions[values_2['bore_locations'].size]
+          assert_equal(values_2['logtime'], table[:logtime])
+          assert_equal(values_2['g'].size, table[:heights].size)
+          table[:heights].each_with_index do |h, i|
+            key = "#{table[:spacings][i].to_i}._#{h.to_i}._#{table[:radii][i]}"
+            assert_equal(values_2['g'][key], table[:g][i])
+          end
+        end
       end
     end
   end
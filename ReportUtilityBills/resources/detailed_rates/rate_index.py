@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Script to compile detailed utility rate (tariff) JSON files into a single indexed SQLite database.
+Tariffs can be read from openei_rates.zip (produced by `openstudio tasks.rb download_utility_rates`)
+or a directory of JSON files, queried by utility, sector, state/zip code, and effective date,
+and exported back to the per-file JSON format accepted by the ReportUtilityBills measure.
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import array
+import sqlite3
+import zipfile
+import argparse
+
+SCHEMA = """
+CREATE TABLE rates (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL,
+    label TEXT,
+    utility TEXT,
+    eiaid INTEGER,
+    name TEXT,
+    sector TEXT,
+    startdate TEXT,
+    fixedchargeunits TEXT,
+    fixedchargefirstmeter REAL,
+    minchargeunits TEXT,
+    mincharge REAL,
+    num_periods INTEGER,
+    max_tiers INTEGER,
+    weekday_schedule BLOB,
+    weekend_schedule BLOB,
+    tier_rates TEXT,
+    tariff TEXT NOT NULL
+);
+CREATE TABLE utility_zipcodes (
+    zip TEXT NOT NULL,
+    eiaid INTEGER NOT NULL,
+    state TEXT
+);
+"""
+
+INDEXES = """
+CREATE INDEX idx_rates_utility ON rates (utility);
+CREATE INDEX idx_rates_eiaid ON rates (eiaid);
+CREATE INDEX idx_rates_sector ON rates (sector);
+CREATE INDEX idx_rates_startdate ON rates (startdate);
+CREATE INDEX idx_utility_zipcodes_zip ON utility_zipcodes (zip);
+CREATE INDEX idx_utility_zipcodes_state ON utility_zipcodes (state);
+CREATE INDEX idx_utility_zipcodes_eiaid ON utility_zipcodes (eiaid);
+"""
+
+
+def valid_filename(x):
+    """Same as valid_filename() in ReportUtilityBills/resources/util.rb."""
+    x = re.sub(r'[^0-9A-Za-z\s]', '', '' if x is None else f"{x}")  # remove non-alphanumeric
+    x = re.sub(r'\s+', ' ', x).strip()  # remove multiple spaces
+    return x
+
+
+def get_tariff_filename(item):
+    """Get the file name of a tariff, as named by process_usurdb() in ReportUtilityBills/resources/util.rb."""
+    filename = f"{valid_filename(item.get('utility'))} - {valid_filename(item.get('name'))}"
+    if item.get('startdate') is not None:
+        filename += f" (Effective {str(item['startdate']).split(' ')[0]})"
+    return f'{filename}.json'
+
+
+def pack_schedule(schedule):
+    """Pack a 12x24 month/hour period schedule into bytes (one unsigned byte per hour)."""
+    if schedule is None:
+        return None
+    return array.array('B', [period for month in schedule for period in month]).tobytes()
+
+
+def unpack_schedule(blob):
+    """Unpack bytes produced by pack_schedule() into a 12x24 month/hour period schedule."""
+    if blob is None:
+        return None
+    values = array.array('B', blob).tolist()
+    return [values[i:i + 24] for i in range(0, len(values), 24)]
+
+
+def get_tier_rates(item):
+    """Get the energy rate structure as a compact [[(max, rate + adj), ...], ...] list per period."""
+    structure = item.get('energyratestructure')
+    if structure is None:
+        return None
+    return [[(tier.get('max'), tier.get('rate', 0) + tier.get('adj', 0)) for tier in period] for period in structure]
+
+
+def read_tariffs(source):
+    """Yield (filename, tariff dict) pairs from a zip file or directory of tariff JSON files."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for name in sorted(zf.namelist()):
+                if name.endswith('.json'):
+                    yield os.path.basename(name), json.loads(zf.read(name))
+    else:
+        for name in sorted(os.listdir(source)):
+            if name.endswith('.json'):
+                with open(os.path.join(source, name)) as f:
+                    yield name, json.load(f)
+
+
+def build_index(db_path, sources, zipcodes_csv=None):
+    """Compile tariff JSON files into a SQLite database.
+
+    Args:
+        db_path: Path of the SQLite database to create (overwritten if it exists)
+        sources: List of zip files and/or directories of tariff JSON files
+        zipcodes_csv: Optional CSV (e.g., OpenEI's utility rates by zip code) with zip, eiaid, and state columns
+
+    Returns:
+        The number of tariffs indexed
+    """
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+
+    rows = []
+    for source in sources:
+        for filename, tariff in read_tariffs(source):
+            item = tariff['items'][0]
+            weekday_schedule = item.get('energyweekdayschedule')
+            structure = item.get('energyratestructure') or []
+            tier_rates = get_tier_rates(item)
+            rows.append((filename,
+                         item.get('label'),
+                         item.get('utility'),
+                         item.get('eiaid'),
+                         item.get('name'),
+                         item.get('sector'),
+                         item.get('startdate'),
+                         item.get('fixedchargeunits'),
+                         item.get('fixedchargefirstmeter'),
+                         item.get('minchargeunits'),
+                         item.get('mincharge'),
+                         len(structure),
+                         max([len(period) for period in structure], default=0),
+                         pack_schedule(weekday_schedule),
+                         pack_schedule(item.get('energyweekendschedule')),
+                         json.dumps(tier_rates, separators=(',', ':')) if tier_rates is not None else None,
+                         json.dumps(tariff, separators=(',', ':'))))
+
+    conn.executemany('INSERT INTO rates (filename, label, utility, eiaid, name, sector, startdate, '
+                     'fixedchargeunits, fixedchargefirstmeter, minchargeunits, mincharge, num_periods, max_tiers, '
+                     'weekday_schedule, weekend_schedule, tier_rates, tariff) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    if zipcodes_csv:
+        with open(zipcodes_csv, newline='') as f:
+            zip_rows = [(row['zip'].zfill(5), int(float(row['eiaid'])), row.get('state'))
+                        for row in csv.DictReader(f) if row.get('eiaid')]
+        conn.executemany('INSERT INTO utility_zipcodes (zip, eiaid, state) VALUES (?, ?, ?)', zip_rows)
+
+    conn.executescript(INDEXES)
+    conn.commit()
+    conn.close()
+
+    return len(rows)
+
+
+class RateIndex:
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+
+    def close(self):
+        self.conn.close()
+
+    def query(self, utility=None, eiaid=None, name=None, sector=None, state=None, zipcode=None,
+              effective_on=None, latest_only=False):
+        """Find tariffs matching all of the given criteria.
+
+        Args:
+            utility: Utility name; '%' wildcards are allowed
+            eiaid: EIA utility ID
+            name: Tariff name; '%' wildcards are allowed
+            sector: Sector (e.g., 'Residential')
+            state: State code served by the utility (requires zip code data)
+            zipcode: Zip code served by the utility (requires zip code data)
+            effective_on: Only include tariffs with a start date on or before this 'YYYY-MM-DD' date
+            latest_only: Only include the most recent tariff for each utility/name
+
+        Returns:
+            A list of dicts of the tariff summary fields (excluding the full tariff)
+        """
+        where = []
+        params = []
+        if utility is not None:
+            where.append('utility LIKE ?')
+            params.append(utility)
+        if eiaid is not None:
+            where.append('eiaid = ?')
+            params.append(eiaid)
+        if name is not None:
+            where.append('name LIKE ?')
+            params.append(name)
+        if sector is not None:
+            where.append('sector = ?')
+            params.append(sector)
+        if state is not None:
+            where.append('eiaid IN (SELECT eiaid FROM utility_zipcodes WHERE state = ?)')
+            params.append(state)
+        if zipcode is not None:
+            where.append('eiaid IN (SELECT eiaid FROM utility_zipcodes WHERE zip = ?)')
+            params.append(str(zipcode).zfill(5))
+        if effective_on is not None:
+            where.append('(startdate IS NULL OR substr(startdate, 1, 10) <= ?)')
+            params.append(effective_on)
+
+        sql = ('SELECT id, filename, label, utility, eiaid, name, sector, startdate, fixedchargeunits, '
+               'fixedchargefirstmeter, minchargeunits, mincharge, num_periods, max_tiers FROM rates')
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY utility, name, startdate DESC'
+
+        results = []
+        seen = set()
+        for row in self.conn.execute(sql, params):
+            if latest_only:
+                key = (row['utility'], row['name'])
+                if key in seen:
+                    continue
+                seen.add(key)
+            results.append(dict(row))
+        return results
+
+    def get_tariff(self, rate_id):
+        """Get the full tariff (i.e., the contents of the tariff JSON file) for a rate id."""
+        row = self.conn.execute('SELECT tariff FROM rates WHERE id = ?', (rate_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row['tariff'])
+
+    def get_schedules(self, rate_id):
+        """Get the pre-parsed (weekday schedule, weekend schedule, tier rates) for a rate id."""
+        row = self.conn.execute('SELECT weekday_schedule, weekend_schedule, tier_rates FROM rates WHERE id = ?',
+                                (rate_id,)).fetchone()
+        if row is None:
+            return None
+        tier_rates = json.loads(row['tier_rates']) if row['tier_rates'] is not None else None
+        return unpack_schedule(row['weekday_schedule']), unpack_schedule(row['weekend_schedule']), tier_rates
+
+    def export(self, rate_ids, output_dir):
+        """Export tariffs to individual JSON files that can be used as the HPXML ElectricityTariffFilePath.
+
+        Args:
+            rate_ids: List of rate ids to export
+            output_dir: Directory to write the tariff JSON files to
+
+        Returns:
+            A list of the exported file paths
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for rate_id in rate_ids:
+            row = self.conn.execute('SELECT tariff FROM rates WHERE id = ?', (rate_id,)).fetchone()
+            if row is None:
+                continue
+            tariff = json.loads(row['tariff'])
+            path = os.path.join(output_dir, get_tariff_filename(tariff['items'][0]))
+            with open(path, 'w') as f:
+                json.dump(tariff, f, indent=2)
+            paths.append(path)
+        return paths
+
+
+def main():
+    """Main function to build, query, or export from the tariff database."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Indexed utility rate library')
+    parser.add_argument('--db', default=os.path.join(script_dir, 'openei_rates.sqlite'), help='Path of the SQLite database')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Compile tariff JSON files into the database')
+    build_parser.add_argument('sources', nargs='*', default=[os.path.join(script_dir, 'openei_rates.zip')],
+                              help='Zip files or directories of tariff JSON files (default: openei_rates.zip)')
+    build_parser.add_argument('--zipcodes', help='CSV file with zip, eiaid, and state columns')
+
+    for name in ['query', 'export']:
+        sub = subparsers.add_parser(name, help=f'{name.capitalize()} tariffs matching the criteria')
+        sub.add_argument('--utility', help="Utility name ('%%' wildcards allowed)")
+        sub.add_argument('--eiaid', type=int, help='EIA utility ID')
+        sub.add_argument('--name', help="Tariff name ('%%' wildcards allowed)")
+        sub.add_argument('--sector', default='Residential', help='Sector (default: Residential)')
+        sub.add_argument('--state', help='State code')
+        sub.add_argument('--zip', dest='zipcode', help='Zip code')
+        sub.add_argument('--effective-on', help='Only tariffs effective on this YYYY-MM-DD date')
+        sub.add_argument('--latest', action='store_true', help='Only the most recent tariff per utility/name')
+    export_parser = subparsers.choices['export']
+    export_parser.add_argument('--output-dir', required=True, help='Directory to write tariff JSON files to')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        num_rates = build_index(args.db, args.sources, args.zipcodes)
+        print(f"{num_rates} rates indexed in {args.db}.")
+        sys.exit(0)
+
+    if not os.path.exists(args.db):
+        sys.exit(f"Database {args.db} not found; run the build command first.")
+
+    index = RateIndex(args.db)
+    rates = index.query(utility=args.utility, eiaid=args.eiaid, name=args.name, sector=args.sector,
+                        state=args.state, zipcode=args.zipcode, effective_on=args.effective_on,
+                        latest_only=args.latest)
+    if args.command == 'query':
+        for rate in rates:
+            print(f"{rate['id']}: {rate['filename']}")
+        print(f"{len(rates)} rates found.")
+    elif args.command == 'export':
+        paths = index.export([rate['id'] for rate in rates], args.output_dir)
+        print(f"{len(paths)} rates exported to {args.output_dir}.")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3370,6 +3370,7 @@ def download_g_functions
   num_configs_actual = process_g_functions(filepath)
 
   puts "#{num_configs_actual} config files are available in #{g_functions_dir}."
+  puts "Run 'python #{File.join(g_functions_dir, 'build_g_functions.py')}' to update g_functions.bin."
   puts 'Completed.'
   exit!
 end
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Script to run stochastic occupancy ensembles (i.e., many schedule seeds per HPXML file) through
+a pool of persistent run_simulation.rb workers. Rather than running a fixed number of seeds, each
+home stops receiving new seeds once the confidence intervals of the selected annual outputs are
+within the target precision, and the freed workers move on to the remaining homes.
+"""
+
+import os
+import re
+import sys
+import csv
+import math
+import argparse
+import statistics
+
+from worker_pool import WorkerPool
+
+DEFAULT_OUTPUTS = ['Energy Use: Total (MBtu)',
+                   'Peak Electricity: Annual Total (W)',
+                   'Utility Bills: Default: Total (USD)']
+
+# Two-sided 95% Student's t critical values by degrees of freedom; the normal value is used beyond 30
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def get_t_value(dof):
+    if dof <= len(T_95):
+        return T_95[dof - 1]
+    return statistics.NormalDist().inv_cdf(0.975)
+
+
+def read_results(run_dir):
+    """Read the annual results and utility bills (prefixed with 'Utility Bills: ') of a run directory."""
+    results = {}
+    for filename, prefix in [('results_annual.csv', ''), ('results_bills.csv', 'Utility Bills: ')]:
+        path = os.path.join(run_dir, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='') as f:
+            for row in csv.reader(f):
+                if len(row) < 2:
+                    continue
+                try:
+                    results[prefix + row[0]] = float(row[1])
+                except ValueError:
+                    pass
+    return results
+
+
+def copy_hpxml(hpxml, path):
+    """Copy an HPXML file, making any relative file paths it references (e.g., schedule or weather files)
+    absolute so that the copy can be run from a different directory."""
+    hpxml_dir = os.path.dirname(os.path.abspath(hpxml))
+
+    def make_absolute(match):
+        file_path = match.group(2)
+        if not os.path.isabs(file_path) and os.path.exists(os.path.join(hpxml_dir, file_path)):
+            file_path = os.path.abspath(os.path.join(hpxml_dir, file_path))
+        return match.group(1) + file_path + match.group(3)
+
+    with open(hpxml) as f:
+        content = f.read()
+    content = re.sub(r'(>\s*)([^<>]+?\.(?:csv|epw|json|xml))(\s*<)', make_absolute, content)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class RunningStats:
+    """Running mean and variance of an output (Welford's algorithm)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def get_half_width(self):
+        """Get the half-width of the 95% confidence interval of the mean."""
+        if self.n < 2:
+            return math.inf
+        std = math.sqrt(self.m2 / (self.n - 1))
+        return get_t_value(self.n - 1) * std / math.sqrt(self.n)
+
+
+class Home:
+    def __init__(self, hpxml, outputs):
+        self.hpxml = hpxml
+        self.name = os.path.splitext(os.path.basename(hpxml))[0]
+        self.stats = {output: RunningStats() for output in outputs}
+        self.num_scheduled = 0
+        self.num_completed = 0
+        self.num_failed = 0
+        self.reported = False
+
+    def is_converged(self, precision, abs_precision, min_seeds):
+        """Whether the 95% confidence interval of every output's mean is within +/- precision (a fraction of the mean)."""
+        if self.num_completed - self.num_failed < min_seeds:
+            return False
+        return all(stats.get_half_width() <= max(precision * abs(stats.mean), abs_precision)
+                   for stats in self.stats.values())
+
+    def get_num_seeds_needed(self, precision, abs_precision, min_seeds, max_seeds):
+        """Estimate the total number of seeds needed to converge, based on the current sample standard deviations."""
+        n_needed = min_seeds
+        for stats in self.stats.values():
+            if stats.n < 2:
+                continue
+            std = math.sqrt(stats.m2 / (stats.n - 1))
+            tolerance = max(precision * abs(stats.mean), abs_precision)
+            n_needed = max(n_needed, math.ceil((get_t_value(stats.n - 1) * std / tolerance) ** 2))
+        return min(n_needed, max_seeds)
+
+
+class Ensemble:
+    def __init__(self, hpxmls, output_dir, outputs=DEFAULT_OUTPUTS, precision=0.01, abs_precision=1e-6,
+                 min_seeds=5, max_seeds=50, first_seed=1, job_options=None):
+        """Run stochastic occupancy ensembles for HPXML files.
+
+        Args:
+            hpxmls: List of HPXML file paths
+            output_dir: Directory in which each seed is run, as <output_dir>/<HPXML name>/seed<seed>
+            outputs: Annual outputs (from results_annual.csv, or results_bills.csv with a 'Utility Bills: ' prefix) to converge
+            precision: Target half-width of the 95% confidence interval of each output's mean, as a fraction of the mean
+            abs_precision: Target half-width used instead when it is larger (i.e., for outputs with means near zero)
+            min_seeds: Minimum number of successful seeds per home
+            max_seeds: Maximum number of seeds per home
+            first_seed: Seed of the first run for each home; subsequent runs use consecutive seeds
+            job_options: Optional dict of additional run_simulation.rb options for every job (e.g., {'skip_validation': True})
+        """
+        self.homes = [Home(hpxml, outputs) for hpxml in hpxmls]
+        self.output_dir = output_dir
+        self.outputs = outputs
+        self.precision = precision
+        self.abs_precision = abs_precision
+        self.min_seeds = min_seeds
+        self.max_seeds = max_seeds
+        self.first_seed = first_seed
+        self.job_options = job_options or {}
+        self.results_path = os.path.join(output_dir, 'ensemble_results.csv')
+        self.error = None
+        self.summary_path = os.path.join(output_dir, 'ensemble_summary.csv')
+
+    def is_done(self, home):
+        return (home.is_converged(self.precision, self.abs_precision, self.min_seeds) or
+                home.num_completed >= self.max_seeds)
+
+    def next_job(self):
+        """Get the next seed to run, favoring the homes earliest in the list so that each home finishes as soon as possible.
+
+        A home only gets more seeds in flight than it is currently estimated to need once it has completed more of them.
+        Each seed runs its own copy of the HPXML file, since adding stochastic schedules modifies the HPXML file.
+
+        Returns:
+            A (Home, job dict) tuple, or None if no seed should be run until more results are available
+        """
+        if self.error:
+            return None
+        for home in self.homes:
+            if self.is_done(home) or home.num_scheduled >= self.max_seeds:
+                continue
+            n_needed = home.get_num_seeds_needed(self.precision, self.abs_precision, self.min_seeds, self.max_seeds)
+            if home.num_scheduled >= max(n_needed, home.num_completed + 1):
+                continue
+            seed = self.first_seed + home.num_scheduled
+            home.num_scheduled += 1
+            seed_dir = os.path.join(os.path.abspath(self.output_dir), home.name, f'seed{seed}')
+            seed_hpxml = os.path.join(seed_dir, os.path.basename(home.hpxml))
+            copy_hpxml(home.hpxml, seed_hpxml)
+            job = dict(self.job_options,
+                       hpxml=seed_hpxml,
+                       output_dir=seed_dir,
+                       add_stochastic_schedules=True,
+                       master_seed=seed,
+                       output_format='csv')
+            return home, job
+        return None
+
+    def on_response(self, home, job, response, results_writer):
+        home.num_completed += 1
+        if not response['success']:
+            home.num_failed += 1
+            print(f"FAILED: {home.name} seed {job['master_seed']}: {response.get('error')}")
+            return
+
+        results = read_results(response['run_dir'])
+        missing_outputs = [output for output in self.outputs if output not in results]
+        if missing_outputs:
+            # A missing output would never converge (or would "converge" on a constant), so stop scheduling seeds
+            home.num_failed += 1
+            self.error = (f"Output(s) {', '.join(missing_outputs)} not found in results_annual.csv or results_bills.csv "
+                          f"of {response['run_dir']}.")
+            print(f"ERROR: {self.error}")
+            return
+
+        for output in self.outputs:
+            home.stats[output].add(results[output])
+        results_writer.writerow([home.name, job['master_seed']] + [results[output] for output in self.outputs])
+
+        if self.is_done(home) and not home.reported:
+            home.reported = True
+            status = 'converged' if home.is_converged(self.precision, self.abs_precision, self.min_seeds) else 'reached max seeds'
+            print(f"{home.name}: {status} after {home.num_completed - home.num_failed} seeds.")
+
+    def run(self, pool):
+        """Run the ensembles using a WorkerPool and write the per-seed results and per-home summary CSVs."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self.results_path, 'w', newline='') as f:
+            results_writer = csv.writer(f)
+            results_writer.writerow(['HPXML', 'Seed'] + self.outputs)
+
+            homes = []
+
+            def next_job():
+                next_home_job = self.next_job()
+                if next_home_job is None:
+                    return None
+                home, job = next_home_job
+                job['id'] = len(homes)
+                homes.append(home)
+                return job
+
+            def on_response(job, response):
+                self.on_response(homes[job['id']], job, response, results_writer)
+                f.flush()
+
+            pool.run_dynamic(next_job, on_response)
+
+        self.write_summary()
+
+    def write_summary(self):
+        with open(self.summary_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            header = ['HPXML', 'Seeds', 'Failed Seeds', 'Converged']
+            for output in self.outputs:
+                header += [f'{output}: Mean', f'{output}: 95% CI Half-Width']
+            writer.writerow(header)
+            for home in self.homes:
+                row = [home.name, home.num_completed - home.num_failed, home.num_failed,
+                       home.is_converged(self.precision, self.abs_precision, self.min_seeds)]
+                for output in self.outputs:
+                    stats = home.stats[output]
+                    row += [stats.mean if stats.n > 0 else None, stats.get_half_width() if stats.n > 1 else None]
+                writer.writerow(row)
+
+
+def main():
+    """Main function to run stochastic occupancy ensembles."""
+    parser = argparse.ArgumentParser(description='Run stochastic occupancy ensembles until the selected annual outputs converge')
+    parser.add_argument('-x', '--xml', dest='hpxmls', nargs='+', required=True, help='HPXML files')
+    parser.add_argument('-o', '--output-dir', required=True, help='Output directory; each seed is run in <output-dir>/<HPXML name>/seed<seed>')
+    parser.add_argument('-n', '--num-workers', type=int, default=os.cpu_count(), help='Number of workers (default: number of CPUs)')
+    parser.add_argument('--output', dest='outputs', action='append', help='Annual output to converge; can be called multiple times (default: total energy use, annual peak electricity, and default scenario total bill)')
+    parser.add_argument('--precision', type=float, default=0.01, help='Target 95%% confidence interval half-width, as a fraction of the mean (default: 0.01)')
+    parser.add_argument('--abs-precision', type=float, default=1e-6, help='Target 95%% confidence interval half-width in output units, used when larger (default: 1e-6)')
+    parser.add_argument('--min-seeds', type=int, default=5, help='Minimum number of seeds per HPXML (default: 5)')
+    parser.add_argument('--max-seeds', type=int, default=50, help='Maximum number of seeds per HPXML (default: 50)')
+    parser.add_argument('--first-seed', type=int, default=1, help='Seed of the first run for each HPXML (default: 1)')
+    parser.add_argument('--openstudio', default='openstudio', help='Path to the OpenStudio CLI (default: openstudio)')
+    parser.add_argument('--log-dir', help='Directory to write worker output to')
+    parser.add_argument('--skip-validation', action='store_true', help='Skip Schema/Schematron validation')
+    args = parser.parse_args()
+
+    if args.min_seeds < 2:
+        parser.error('--min-seeds must be at least 2.')
+
+    ensemble = Ensemble(args.hpxmls, args.output_dir, args.outputs or DEFAULT_OUTPUTS, args.precision, args.abs_precision,
+                        args.min_seeds, args.max_seeds, args.first_seed, {'skip_validation': args.skip_validation})
+
+    with WorkerPool(args.num_workers, args.openstudio, args.log_dir) as pool:
+        ensemble.run(pool)
+
+    if ensemble.error:
+        print(f"Ensemble stopped: {ensemble.error}")
+        sys.exit(1)
+
+    num_seeds = sum(home.num_completed for home in ensemble.homes)
+    num_converged = sum(1 for home in ensemble.homes if home.is_converged(args.precision, args.abs_precision, args.min_seeds))
+    print(f"{num_converged}/{len(ensemble.homes)} HPXML files converged using {num_seeds} simulations "
+          f"(vs. {len(ensemble.homes) * args.max_seeds} with a fixed {args.max_seeds} seeds).")
+    print(f"Results written to {ensemble.results_path} and {ensemble.summary_path}.")
+    sys.exit(0 if num_converged == len(ensemble.homes) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,13 @@
 
 start_time = Time.now
 
+# Start coverage before any measure/resource files are loaded so that all
+# executed lines are recorded (see --coverage below)
+if ARGV.include? '--coverage'
+  require 'coverage'
+  Coverage.start(lines: true)
+end
+
 require 'fileutils'
 require 'optparse'
 require 'pathname'
@@ -117,6 +124,75 @@ def run_workflow(basedir, rundir, hpxml, debug, skip_validation, add_comp_loads,
   return results[:success]
 end
 
+def run_worker(basedir)
+  require 'json'
+
+  # Load all measures, resource files, and validators up front so
+  # that each job only pays for the translation/simulation
+  measures_dir = File.join(basedir, '..')
+  ['BuildResidentialScheduleFile', 'HPXMLtoOpenStudio', 'ReportSimulationOutput', 'ReportUtilityBills'].each do |measure_subdir|
+    get_measure_instance(File.join(measures_dir, measure_subdir, 'measure.rb'))
+  end
+  XMLValidator.enable_cache
+  XMLValidator.get_xml_validator(File.join(measures_dir, 'HPXMLtoOpenStudio', 'resources', 'hpxml_schema', 'HPXML.xsd'))
+  XMLValidator.get_xml_validator(File.join(measures_dir, 'HPXMLtoOpenStudio', 'resources', 'hpxml_schematron', 'EPvalidator.sch'))
+
+  # Responses are written to the original stdout; everything else
+  # (including EnergyPlus subprocess output) is redirected to stderr
+  protocol_out = $stdout.dup
+  protocol_out.sync = true
+  $stdout.reopen($stderr)
+
+  protocol_out.puts(JSON.generate({ ready: true }))
+  $stdin.each_line do |line|
+    next if line.strip.empty?
+
+    job_start_time = Time.now
+    job = {}
+    rundir = nil
+    error = nil
+    begin
+      job = JSON.parse(line)
+      hpxml = File.expand_path(job['hpxml'].to_s)
+      unless File.exist?(hpxml) && hpxml.downcase.end_with?('.xml')
+        fail "'#{hpxml}' does not exist or is not an .xml file."
+      end
+
+      output_dir = File.expand_path(job.fetch('output_dir', File.dirname(hpxml)))
+      FileUtils.mkdir_p(output_dir)
+      rundir = File.join(output_dir, 'run')
+
+      success = run_workflow(basedir, rundir, hpxml, job.fetch('debug', false), job.fetch('skip_validation', false), job.fetch('add_component_loads', false),
+                             job.fetch('output_format', 'csv'), job['building_id'], job.fetch('ep_input_format', 'idf'), job.fetch('add_stochastic_schedules', false),
+                             job.fetch('hourly', []), job.fetch('daily', []), job.fetch('monthly', []), job.fetch('timestep', []),
+                             job.fetch('skip_simulation', false), job['master_seed'])
+    rescue StandardError => e
+      success = false
+      error = e.message
+    end
+
+    protocol_out.puts(JSON.generate({ id: job['id'], success: success, run_dir: rundir, error: error, elapsed: (Time.now - job_start_time).round(2) }))
+  end
+end
+
+def write_coverage(coverage_path, repo_dir)
+  require 'json'
+
+  # Map of repo-relative Ruby file path => executed line numbers
+  coverage = {}
+  Coverage.result.each do |path, result|
+    path = File.expand_path(path)
+    next unless path.start_with? "#{repo_dir}/"
+
+    lines = result[:lines].each_index.select { |i| result[:lines][i].to_i > 0 }.map { |i| i + 1 }
+    next if lines.empty?
+
+    coverage[path.delete_prefix("#{repo_dir}/")] = lines
+  end
+
+  File.write(coverage_path, JSON.generate(coverage.sort.to_h))
+end
+
 options = {}
 OptionParser.new do |opts|
   opts.banner = "Usage: #{File.basename(__FILE__)} -x building.xml [OPTIONS]"
@@ -179,6 +255,16 @@ OptionParser.new do |opts|
     options[:master_seed] = t
   end
 
+  options[:coverage] = false
+  opts.on('--coverage', 'Write the lines of Ruby code executed by the workflow to run/coverage.json') do |_t|
+    options[:coverage] = true
+  end
+
+  options[:worker] = false
+  opts.on('--worker', 'Run as a persistent worker that reads JSON job requests (one per line) from stdin; see worker_pool.py') do |_t|
+    options[:worker] = true
+  end
+
   options[:ep_input_format] = 'idf'
   opts.on('--ep-input-format TYPE', 'EnergyPlus input file format (idf, epjson)') do |t|
     options[:ep_input_format] = t
@@ -211,6 +297,8 @@ if options[:version]
   puts "HPXML v#{Version::HPXML_Version}"
   puts "OpenStudio v#{OpenStudio.openStudioLongVersion}"
   puts "EnergyPlus v#{OpenStudio.energyPlusVersion}.#{OpenStudio.energyPlusBuildSHA}"
+elsif options[:worker]
+  run_worker(basedir)
 else
   if not options[:hpxml]
     fail "HPXML argument is required. Call #{File.basename(__FILE__)} -h for usage."
@@ -245,6 +333,10 @@ else
                          options[:hourly_outputs], options[:daily_outputs], options[:monthly_outputs], options[:timestep_outputs],
                          options[:skip_simulation], options[:master_seed])
 
+  if options[:coverage]
+    write_coverage(File.join(rundir, 'coverage.json'), File.expand_path(File.join(basedir, '..')))
+  end
+
   if not success
     exit! 1
   end
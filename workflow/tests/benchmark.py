@@ -0,0 +1,241 @@
+import os
+import sys
+import csv
+import time
+import shutil
+import argparse
+import datetime
+import tempfile
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+schedule_files_dir = os.path.join(this_dir, '..', '..', 'HPXMLtoOpenStudio', 'resources', 'schedule_files')
+sys.path.insert(0, schedule_files_dir)
+
+from compare import BaseCompare  # noqa: E402
+from merge import merge_csv_files  # noqa: E402
+from print_diff import compare_dataframes  # noqa: E402
+
+
+# Benchmarks the Python tooling (compare.py, merge.py, print_diff.py) using synthetic result and
+# schedule CSVs that match the column schemas of workflow/tests/base_results and the schedule files,
+# at multiples (scales) of their real sizes. Wall time and peak memory are appended to a history
+# file, and regressions relative to the previous commit's results are reported.
+
+default_base_results_folder = os.path.join(this_dir, 'base_results')
+default_history_file = os.path.join(this_dir, 'benchmark_results', 'history.csv')
+
+HISTORY_FIELDS = ['commit', 'timestamp', 'benchmark', 'scale', 'wall_time', 'peak_memory_mb']
+
+
+def generate_results_csvs(base_results_folder, base_folder, feature_folder, scale, seed=0):
+    """Write synthetic base/feature results_simulations_*.csv files with scale times the rows of the real ones."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(base_folder, exist_ok=True)
+    os.makedirs(feature_folder, exist_ok=True)
+    for file in sorted(os.listdir(base_results_folder)):
+        if not file.startswith('results_simulations_'):
+            continue
+        columns = pd.read_csv(os.path.join(base_results_folder, file), nrows=0).columns
+        n_rows = sum(1 for _ in open(os.path.join(base_results_folder, file))) - 1
+        n_rows *= scale
+
+        index = pd.Index([f'home-{i}.xml' for i in range(n_rows)], name=columns[0])
+        values = rng.lognormal(mean=2.0, sigma=1.5, size=(n_rows, len(columns) - 1)).round(1)
+        values[rng.random(values.shape) < 0.5] = 0.0  # Many outputs are zero for any given home
+        base_df = pd.DataFrame(values, index=index, columns=columns[1:])
+        base_df.to_csv(os.path.join(base_folder, file))
+
+        # Feature results differ for a fraction of homes
+        changed = rng.random(n_rows) < 0.2
+        values[changed] *= rng.normal(1.0, 0.05, size=(changed.sum(), values.shape[1]))
+        feature_df = pd.DataFrame(values.round(1), index=index, columns=columns[1:])
+        feature_df.to_csv(os.path.join(feature_folder, file))
+
+
+def generate_schedule_csvs(schedules_folder, before_folder, after_folder, scale, seed=0):
+    """Write synthetic before/after schedule CSVs, scale copies of each real schedule file's schema/length."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(before_folder, exist_ok=True)
+    os.makedirs(after_folder, exist_ok=True)
+    for file in sorted(os.listdir(schedules_folder)):
+        if not file.endswith('.csv'):
+            continue
+        df = pd.read_csv(os.path.join(schedules_folder, file))
+        numeric_cols = df.select_dtypes('number').columns
+        for i in range(scale):
+            values = rng.random(df[numeric_cols].shape).round(4)
+            values[values < 0.3] = 0.0
+            before_df = pd.DataFrame(values, columns=numeric_cols)
+            after_df = before_df.copy()
+            if len(numeric_cols) > 0:
+                # Change about half the columns of the after version
+                for col in numeric_cols[rng.random(len(numeric_cols)) < 0.5]:
+                    after_df[col] = (after_df[col] * rng.normal(1.0, 0.1, len(after_df))).round(4)
+            name = f'{os.path.splitext(file)[0]}_{i}.csv'
+            before_df.to_csv(os.path.join(before_folder, name), index=False)
+            after_df.to_csv(os.path.join(after_folder, name), index=False)
+
+
+def setup_compare_results(tmp_dir, scale, base_results_folder):
+    base_folder = os.path.join(tmp_dir, 'base')
+    feature_folder = os.path.join(tmp_dir, 'feature')
+    export_folder = os.path.join(tmp_dir, 'comparisons')
+    generate_results_csvs(base_results_folder, base_folder, feature_folder, scale)
+    os.makedirs(export_folder, exist_ok=True)
+    compare = BaseCompare(base_folder, feature_folder, export_folder, None)
+    return compare.results
+
+
+def setup_compare_visualize(tmp_dir, scale, base_results_folder):
+    base_folder = os.path.join(tmp_dir, 'base')
+    feature_folder = os.path.join(tmp_dir, 'feature')
+    export_folder = os.path.join(tmp_dir, 'comparisons')
+    generate_results_csvs(base_results_folder, base_folder, feature_folder, scale)
+    os.makedirs(export_folder, exist_ok=True)
+    compare = BaseCompare(base_folder, feature_folder, export_folder, None)
+    return compare.visualize
+
+
+def setup_merge(tmp_dir, scale, base_results_folder):
+    base_folder = os.path.join(tmp_dir, 'base')
+    feature_folder = os.path.join(tmp_dir, 'feature')
+    generate_results_csvs(base_results_folder, base_folder, feature_folder, scale)
+    files = sorted(os.listdir(base_folder))
+
+    def run():
+        for file in files:
+            merge_csv_files(os.path.join(base_folder, file),
+                            os.path.join(feature_folder, file),
+                            os.path.join(tmp_dir, f'merged_{file}'))
+    return run
+
+
+def setup_print_diff(tmp_dir, scale, base_results_folder):
+    before_folder = os.path.join(tmp_dir, 'before')
+    after_folder = os.path.join(tmp_dir, 'after')
+    generate_schedule_csvs(schedule_files_dir, before_folder, after_folder, scale)
+    files = sorted(os.listdir(before_folder))
+
+    def run():
+        for file in files:
+            df_git = pd.read_csv(os.path.join(before_folder, file))
+            df_current = pd.read_csv(os.path.join(after_folder, file))
+            compare_dataframes(file, df_git, df_current)
+    return run
+
+
+BENCHMARKS = {
+    'compare_results': setup_compare_results,
+    'compare_visualize': setup_compare_visualize,
+    'merge': setup_merge,
+    'print_diff': setup_print_diff,
+}
+
+
+def run_benchmark(name, scale, base_results_folder, repeat):
+    """Run a benchmark at a scale.
+
+    Returns:
+        A tuple of (minimum wall time [s] across repeats, peak memory [MB] of the traced run)
+    """
+    tmp_dir = tempfile.mkdtemp(prefix=f'benchmark_{name}_')
+    try:
+        func = BENCHMARKS[name](tmp_dir, scale, base_results_folder)
+
+        wall_times = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            func()
+            wall_times.append(time.perf_counter() - t)
+
+        # Measure memory separately since tracing slows down the run
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return min(wall_times), peak / 1024 / 1024
+
+
+def get_commit():
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=this_dir)
+    commit = result.stdout.strip() or 'unknown'
+    dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=this_dir).returncode != 0
+    return f'{commit}-dirty' if dirty else commit
+
+
+def read_history(history_file):
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def append_history(history_file, rows):
+    os.makedirs(os.path.dirname(history_file), exist_ok=True)
+    write_header = not os.path.exists(history_file)
+    with open(history_file, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def get_regressions(history, rows, threshold):
+    """Compare results to the latest previous result (from a different commit) of the same benchmark/scale."""
+    regressions = []
+    for row in rows:
+        previous = [h for h in history if h['benchmark'] == row['benchmark'] and
+                    int(h['scale']) == row['scale'] and h['commit'] != row['commit']]
+        if not previous:
+            continue
+        previous = previous[-1]
+        for metric in ['wall_time', 'peak_memory_mb']:
+            prev_value = float(previous[metric])
+            if prev_value > 0 and row[metric] > (1 + threshold) * prev_value:
+                regressions.append(f"{row['benchmark']} ({row['scale']}x) {metric}: {prev_value:.2f} ({previous['commit']}) -> {row[metric]:.2f}")
+    return regressions
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--benchmarks', action='append', choices=list(BENCHMARKS.keys()), help='Benchmark to run (default: all).')
+    parser.add_argument('-s', '--scales', type=int, action='append', help='Multiple of the real data size (default: 1, 10, 100).')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='Number of timed runs; the minimum wall time is reported.')
+    parser.add_argument('-f', '--base_results_folder', default=default_base_results_folder, help='Path of the folder with the real result schemas.')
+    parser.add_argument('-o', '--history_file', default=default_history_file, help='Path of the history file.')
+    parser.add_argument('-t', '--threshold', type=float, default=0.2, help='Fractional increase reported as a regression.')
+    args = parser.parse_args()
+
+    if args.benchmarks is None:
+        args.benchmarks = list(BENCHMARKS.keys())
+    if args.scales is None:
+        args.scales = [1, 10, 100]
+
+    commit = get_commit()
+    timestamp = datetime.datetime.now().isoformat(timespec='seconds')
+    rows = []
+    for name in args.benchmarks:
+        for scale in args.scales:
+            wall_time, peak_memory_mb = run_benchmark(name, scale, args.base_results_folder, args.repeat)
+            print("%s (%dx): %.2f s, %.1f MB" % (name, scale, wall_time, peak_memory_mb))
+            rows.append({'commit': commit, 'timestamp': timestamp, 'benchmark': name, 'scale': scale,
+                         'wall_time': round(wall_time, 4), 'peak_memory_mb': round(peak_memory_mb, 2)})
+
+    history = read_history(args.history_file)
+    append_history(args.history_file, rows)
+    print("Results appended to %s." % args.history_file)
+
+    regressions = get_regressions(history, rows, args.threshold)
+    if regressions:
+        print("Performance regressions:")
+        for regression in regressions:
+            print("  - %s" % regression)
+        sys.exit(1)
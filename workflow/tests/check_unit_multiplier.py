@@ -0,0 +1,223 @@
+import os
+import sys
+import calendar
+import argparse
+import numpy as np
+import pandas as pd
+
+
+# Checks that results from simulations run with a unit multiplier (e.g., 10x) are consistent with
+# results from the same homes run without one (1x), for a whole batch of run directories at once.
+# Uses the same tolerances as _check_unit_multiplier_results() in util.rb.
+
+MBTU_TO_KBTU = 1000.0
+MBTU_TO_KWH = 293.0710701722222
+
+# Number of systems and thermal zones change between the 1x and 10x runs,
+# so these are removed from the comparison
+EXCLUDED_PREFIXES = ['System Use:',
+                     'Temperature:',
+                     'Humidity Ratio:', 'Relative Humidity:', 'Dewpoint Temperature:', 'Radiant Temperature:', 'Operative Temperature:',
+                     'Utility Bills:',
+                     'HVAC Zone Design Load:',
+                     'HVAC Space Design Load:']
+
+# These output types shouldn't change based on the unit multiplier
+UNSCALED_OUTPUTS = ['Unmet Hours',
+                    'HVAC Design Temperature',
+                    'Weather',
+                    'HVAC Geothermal Loop: Borehole/Trench Length']
+
+
+def get_tolerances(key):
+    """Get the (absolute delta, absolute fraction) tolerances for an output; the fraction may be NaN."""
+    if '(MBtu)' in key or '(kBtu)' in key or '(kWh)' in key:
+        # Energy difference less than 0.5 MBtu or less than 6% (12% for duct component loads)
+        abs_delta_tol = 0.5
+        if 'Component Load' in key and 'Ducts' in key:
+            abs_frac_tol = 0.12
+        else:
+            abs_frac_tol = 0.06
+        if '(kBtu)' in key:
+            abs_delta_tol *= MBTU_TO_KBTU
+        elif '(kWh)' in key:
+            abs_delta_tol *= MBTU_TO_KWH
+    elif 'Peak Electricity:' in key:
+        abs_delta_tol, abs_frac_tol = 500.0, 0.15
+    elif 'Peak Load:' in key:
+        abs_delta_tol, abs_frac_tol = 0.2, 0.1
+    elif 'Hot Water:' in key:
+        abs_delta_tol, abs_frac_tol = 10.0, 0.02
+    elif 'Resilience: Battery' in key:
+        abs_delta_tol, abs_frac_tol = 1.0, 0.01
+    elif 'Airflow:' in key:
+        abs_delta_tol, abs_frac_tol = 0.2, 0.05
+    elif 'Unmet Hours:' in key:
+        abs_delta_tol, abs_frac_tol = 10.0, np.nan
+    elif any(k in key for k in ['HVAC Capacity:', 'HVAC Design Load:', 'HVAC Design Temperature:', 'Weather:',
+                                'HVAC Geothermal Loop:', 'Electric Panel Load:', 'Electric Panel Breaker Spaces:']):
+        abs_delta_tol, abs_frac_tol = 0.0, np.nan
+    elif 'Emissions:' in key:
+        abs_delta_tol, abs_frac_tol = 100.0, 0.05
+    else:
+        return None
+
+    return abs_delta_tol, abs_frac_tol
+
+
+def get_run_dirs(folder):
+    """Get a dict of home name => run directory for each home subfolder with annual results."""
+    run_dirs = {}
+    for name in sorted(os.listdir(folder)):
+        run_dir = os.path.join(folder, name)
+        if os.path.isdir(os.path.join(run_dir, 'run')):
+            run_dir = os.path.join(run_dir, 'run')
+        if os.path.exists(os.path.join(run_dir, 'results_annual.csv')):
+            run_dirs[name] = run_dir
+    return run_dirs
+
+
+def read_annual_results(run_dir):
+    """Read the annual (and electric panel) results of a run directory into a Series."""
+    results = []
+    for file in ['results_annual.csv', 'results_panel.csv']:
+        path = os.path.join(run_dir, file)
+        if not os.path.exists(path):
+            continue
+        df = pd.read_csv(path, header=None, index_col=0, usecols=[0, 1])
+        results.append(pd.to_numeric(df.iloc[:, 0], errors='coerce').dropna())
+    return pd.concat(results)
+
+
+def read_monthly_results(run_dir):
+    """Read the monthly results of a run directory into a DataFrame with '<output> (<units>)' columns."""
+    path = os.path.join(run_dir, 'results_timeseries.csv')
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path, header=[0, 1])
+    df = df.iloc[:, 1:]  # Skip time column
+    df.columns = [f'{header} ({units})' for header, units in df.columns]
+    if len(df) == 12:
+        df.index = list(calendar.month_abbr)[1:]
+    return df.astype(float)
+
+
+def remove_excluded_columns(df):
+    return df[[col for col in df.columns if not any(col.startswith(prefix) for prefix in EXCLUDED_PREFIXES)]]
+
+
+def compare(results_1x, results_10x, unit_multiplier):
+    """Compare 1x and 10x results for all rows and columns at once.
+
+    Args:
+        results_1x: DataFrame of results without a unit multiplier (rows of (home, period), output columns)
+        results_10x: DataFrame of results with the unit multiplier (same layout)
+        unit_multiplier: The unit multiplier of the 10x results
+
+    Returns:
+        A DataFrame with one row per (home, period, output) that is outside the tolerances
+    """
+    results_1x = remove_excluded_columns(results_1x)
+    results_10x = remove_excluded_columns(results_10x)
+
+    rows = results_1x.index.intersection(results_10x.index)
+    cols = sorted(set(results_1x.columns) | set(results_10x.columns))
+    tolerances = {}
+    for col in cols:
+        tols = get_tolerances(col)
+        if tols is None:
+            print("Warning: Unexpected results key: %s. Skipping..." % col)
+            continue
+        tolerances[col] = tols
+    cols = list(tolerances.keys())
+
+    vals_1x = results_1x.reindex(index=rows, columns=cols).fillna(0.0).to_numpy(dtype=float)
+    vals_10x = results_10x.reindex(index=rows, columns=cols).fillna(0.0).to_numpy(dtype=float)
+    scale = np.array([1.0 if any(k in col for k in UNSCALED_OUTPUTS) else unit_multiplier for col in cols])
+    abs_delta_tol = np.array([tolerances[col][0] for col in cols])
+    abs_frac_tol = np.array([tolerances[col][1] for col in cols])
+
+    vals_1x = vals_1x * scale
+    abs_delta = np.abs(vals_1x - vals_10x)
+    abs_avg = np.abs((vals_1x + vals_10x) / 2.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        abs_frac = np.where(abs_avg > 0, abs_delta / abs_avg, np.nan)
+        passed = (abs_delta <= abs_delta_tol) | (abs_frac <= abs_frac_tol)
+
+        # How far outside the tolerances a value is (>1 fails)
+        allowed = np.fmax(abs_delta_tol, abs_frac_tol * abs_avg)
+        excess = np.where(allowed > 0, abs_delta / allowed, np.inf)
+
+    i_rows, i_cols = np.nonzero(~passed)
+    failures = pd.DataFrame({'home': rows.get_level_values(0)[i_rows],
+                             'period': rows.get_level_values(1)[i_rows],
+                             'output': np.array(cols, dtype=object)[i_cols],
+                             '1x (scaled)': vals_1x[i_rows, i_cols],
+                             '10x': vals_10x[i_rows, i_cols],
+                             'abs delta': abs_delta[i_rows, i_cols],
+                             'abs frac': abs_frac[i_rows, i_cols],
+                             'abs delta tol': abs_delta_tol[i_cols],
+                             'abs frac tol': abs_frac_tol[i_cols],
+                             'excess': excess[i_rows, i_cols]})
+    failures['category'] = failures['output'].str.split(':').str[0]
+    return failures
+
+
+def check(folder_1x, folder_10x, unit_multiplier, chunk_size=500):
+    """Compare the annual and monthly results of all homes found in both folders, chunk_size homes at a time."""
+    run_dirs_1x = get_run_dirs(folder_1x)
+    run_dirs_10x = get_run_dirs(folder_10x)
+    homes = sorted(set(run_dirs_1x) & set(run_dirs_10x))
+    for home in sorted(set(run_dirs_1x) ^ set(run_dirs_10x)):
+        print("Warning: %s not found in both folders. Skipping..." % home)
+
+    failures = []
+    for i in range(0, len(homes), chunk_size):
+        chunk = homes[i:i + chunk_size]
+        annual = []
+        monthly = []
+        for run_dirs in [run_dirs_1x, run_dirs_10x]:
+            annual.append(pd.DataFrame({(home, 'Annual'): read_annual_results(run_dirs[home]) for home in chunk}).T)
+            monthly_dfs = {home: read_monthly_results(run_dirs[home]) for home in chunk}
+            monthly_dfs = {home: df for home, df in monthly_dfs.items() if df is not None}
+            monthly.append(pd.concat(monthly_dfs) if monthly_dfs else None)
+        failures.append(compare(annual[0], annual[1], unit_multiplier))
+        if monthly[0] is not None and monthly[1] is not None:
+            failures.append(compare(monthly[0], monthly[1], unit_multiplier))
+
+    if not failures:
+        return pd.DataFrame()
+    return pd.concat(failures, ignore_index=True).sort_values('excess', ascending=False)
+
+
+if __name__ == '__main__':
+
+    default_export_file = 'workflow/tests/comparisons/unit_multiplier_failures.csv'
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--folder_1x', required=True, help='Path of the folder of home run directories without a unit multiplier.')
+    parser.add_argument('-f', '--folder_10x', required=True, help='Path of the folder of home run directories with a unit multiplier.')
+    parser.add_argument('-m', '--unit_multiplier', type=float, default=10, help='Unit multiplier of the 10x runs.')
+    parser.add_argument('-x', '--export_file', default=default_export_file, help='Path of the export file.')
+    parser.add_argument('-n', '--num_worst', type=int, default=5, help='Number of worst offenders to report per output category.')
+    args = parser.parse_args()
+
+    failures = check(args.folder_1x, args.folder_10x, args.unit_multiplier)
+
+    if failures.empty:
+        print("All results are consistent with the unit multiplier.")
+        sys.exit(0)
+
+    export_folder = os.path.dirname(args.export_file)
+    if export_folder and not os.path.exists(export_folder):
+        os.makedirs(export_folder)
+    failures.to_csv(args.export_file, index=False)
+
+    print("%d results outside tolerances across %d homes; written to %s." % (len(failures), failures['home'].nunique(), args.export_file))
+    for category, df in failures.groupby('category'):
+        print("")
+        print("%s:" % category)
+        for _, row in df.head(args.num_worst).iterrows():
+            print("  %s [%s, %s] 1x=%s, 10x=%s, abs_delta_tol=%s, abs_frac_tol=%s" % (row['home'], row['output'], row['period'], row['1x (scaled)'],
+                                                                                      row['10x'], row['abs delta tol'], row['abs frac tol']))
+    sys.exit(1)
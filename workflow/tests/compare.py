@@ -1,19 +1,24 @@
 import os
+import json
 import argparse
+import itertools
 import numpy as np
 import pandas as pd
 import plotly
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.express as px
+from concurrent.futures import ProcessPoolExecutor
+from profiler import Profiler
 
 
 class BaseCompare:
-    def __init__(self, base_folder, feature_folder, export_folder, export_file):
+    def __init__(self, base_folder, feature_folder, export_folder, export_file, profiler=None):
         self.base_folder = base_folder
         self.feature_folder = feature_folder
         self.export_folder = export_folder
         self.export_file = export_file
+        self.profiler = profiler if profiler else Profiler(enabled=False)
 
     @staticmethod
     def intersect_rows(df1, df2):
@@ -45,93 +50,105 @@ class BaseCompare:
                 print("Warning: %s not found. Skipping..." % feature_file)
                 continue
 
-            base_df = read_csv(base_file, index_col=0)
-            feature_df = read_csv(feature_file, index_col=0)
-
-            base_df = self.intersect_rows(base_df, feature_df)
-            feature_df = self.intersect_rows(feature_df, base_df)
-
-            if file == 'results_output.csv':
-                base_df = base_df.select_dtypes(exclude=['string', 'bool'])
-                feature_df = feature_df.select_dtypes(exclude=['string', 'bool'])
-
-            try:
-                df = feature_df - base_df
-            except BaseException:
-                base_df = self.union_columns(base_df, feature_df)
-                feature_df = self.union_columns(feature_df, base_df)
-                df = feature_df != base_df
-                df = df.astype(int)
-
-            df = df.fillna('NA')
-            df.to_csv(os.path.join(self.export_folder, file))
-
-            # Get results charactersistics of groupby columns
-            if file == 'results_characteristics.csv':
-                group_df = base_df[aggregate_columns]
-
-            # Write grouped & aggregated results dfs
-            if file == 'results_output.csv':
-                for col, enum_map in enum_maps.items():
-                    if col in aggregate_columns:
-                        group_df[col] = group_df[col].map(enum_map)
-
-                # Merge groupby df and aggregate
-                sim_ct_base = len(base_df)
-                sim_ct_feature = len(feature_df)
-                if aggregate_columns:
-                    base_df = group_df.merge(base_df, 'outer', left_index=True, right_index=True)\
-                                      .groupby(aggregate_columns)
-                    feature_df = group_df.merge(feature_df, 'outer', left_index=True, right_index=True)\
-                                         .groupby(aggregate_columns)
-                    if aggregate_function == 'sum':
-                        base_df = base_df.sum(min_count=1).stack(dropna=False)
-                        feature_df = feature_df.sum(min_count=1).stack(dropna=False)
-                    elif aggregate_function == 'mean':
-                        base_df = base_df.mean(numeric_only=True).stack(dropna=False)
-                        feature_df = feature_df.mean(numeric_only=True).stack(dropna=False)
-                else:
-                    if aggregate_function == 'sum':
-                        base_df = base_df.sum(min_count=1)
-                        feature_df = feature_df.sum(min_count=1)
-                    elif aggregate_function == 'mean':
-                        base_df = base_df.mean(numeric_only=True)
-                        feature_df = feature_df.mean(numeric_only=True)
+            label = 'results: %s' % file
+            with self.profiler.file(label):
+                with self.profiler.phase(label, 'read'):
+                    base_df = read_csv(base_file, index_col=0)
+                    feature_df = read_csv(feature_file, index_col=0)
+
+                with self.profiler.phase(label, 'align'):
+                    base_df = self.intersect_rows(base_df, feature_df)
+                    feature_df = self.intersect_rows(feature_df, base_df)
+
+                    if file == 'results_output.csv':
+                        base_df = base_df.select_dtypes(exclude=['string', 'bool'])
+                        feature_df = feature_df.select_dtypes(exclude=['string', 'bool'])
+
+                with self.profiler.phase(label, 'diff'):
+                    try:
+                        df = feature_df - base_df
+                    except BaseException:
+                        base_df = self.union_columns(base_df, feature_df)
+                        feature_df = self.union_columns(feature_df, base_df)
+                        df = feature_df != base_df
+                        df = df.astype(int)
+
+                    df = df.fillna('NA')
+
+                with self.profiler.phase(label, 'write'):
+                    df.to_csv(os.path.join(self.export_folder, file))
+
+                # Get results charactersistics of groupby columns
+                if file == 'results_characteristics.csv':
+                    group_df = base_df[aggregate_columns]
+
+                # Write grouped & aggregated results dfs
+                if file == 'results_output.csv':
+                    with self.profiler.phase(label, 'aggregate'):
+                        for col, enum_map in enum_maps.items():
+                            if col in aggregate_columns:
+                                group_df[col] = group_df[col].map(enum_map)
+
+                        # Merge groupby df and aggregate
+                        sim_ct_base = len(base_df)
+                        sim_ct_feature = len(feature_df)
+                        if aggregate_columns:
+                            base_df = group_df.merge(base_df, 'outer', left_index=True, right_index=True)\
+                                              .groupby(aggregate_columns)
+                            feature_df = group_df.merge(feature_df, 'outer', left_index=True, right_index=True)\
+                                                 .groupby(aggregate_columns)
+                            if aggregate_function == 'sum':
+                                base_df = base_df.sum(min_count=1).stack(dropna=False)
+                                feature_df = feature_df.sum(min_count=1).stack(dropna=False)
+                            elif aggregate_function == 'mean':
+                                base_df = base_df.mean(numeric_only=True).stack(dropna=False)
+                                feature_df = feature_df.mean(numeric_only=True).stack(dropna=False)
+                        else:
+                            if aggregate_function == 'sum':
+                                base_df = base_df.sum(min_count=1)
+                                feature_df = feature_df.sum(min_count=1)
+                            elif aggregate_function == 'mean':
+                                base_df = base_df.mean(numeric_only=True)
+                                feature_df = feature_df.mean(numeric_only=True)
 
         if not aggregate_function:
             return
 
-        # Write aggregate results df
-        deltas = pd.DataFrame()
-        deltas['base'] = base_df
-        deltas['feature'] = feature_df
-        deltas['diff'] = deltas['feature'] - deltas['base']
-        deltas_non_zero = deltas[deltas['base'] != 0].index
-        deltas.loc[deltas_non_zero, '% diff'] = (100 * (deltas.loc[deltas_non_zero, 'diff'] /
-                                                 deltas.loc[deltas_non_zero, 'base']))
-        deltas = deltas.round(2)
-        deltas.reset_index(level=aggregate_columns, inplace=True)
-        deltas.index.name = 'enduse'
-        deltas.fillna('n/a', inplace=True)
-        sims_df = pd.DataFrame({'base': sim_ct_base,
-                                'feature': sim_ct_feature,
-                                'diff': 'n/a',
-                                '% diff': 'n/a'},
-                               index=['simulation_count'])
-        sims_df[aggregate_columns] = 'n/a'
-        deltas = pd.concat([sims_df, deltas])
-        for group in aggregate_columns:
-            first_col = deltas.pop(group)
-            deltas.insert(0, group, first_col)
-
-        basename, ext = os.path.splitext(file)
-        if aggregate_columns:
-            basename += '_{aggregate_column}'.format(aggregate_column=aggregate_columns[0])
-
-        deltas.to_csv(
-            os.path.join(
-                self.export_folder,
-                self.export_file))
+        label = 'results: %s' % self.export_file
+        with self.profiler.file(label):
+            with self.profiler.phase(label, 'aggregate'):
+                # Build aggregate results df
+                deltas = pd.DataFrame()
+                deltas['base'] = base_df
+                deltas['feature'] = feature_df
+                deltas['diff'] = deltas['feature'] - deltas['base']
+                deltas_non_zero = deltas[deltas['base'] != 0].index
+                deltas.loc[deltas_non_zero, '% diff'] = (100 * (deltas.loc[deltas_non_zero, 'diff'] /
+                                                         deltas.loc[deltas_non_zero, 'base']))
+                deltas = deltas.round(2)
+                deltas.reset_index(level=aggregate_columns, inplace=True)
+                deltas.index.name = 'enduse'
+                deltas.fillna('n/a', inplace=True)
+                sims_df = pd.DataFrame({'base': sim_ct_base,
+                                        'feature': sim_ct_feature,
+                                        'diff': 'n/a',
+                                        '% diff': 'n/a'},
+                                       index=['simulation_count'])
+                sims_df[aggregate_columns] = 'n/a'
+                deltas = pd.concat([sims_df, deltas])
+                for group in aggregate_columns:
+                    first_col = deltas.pop(group)
+                    deltas.insert(0, group, first_col)
+
+                basename, ext = os.path.splitext(file)
+                if aggregate_columns:
+                    basename += '_{aggregate_column}'.format(aggregate_column=aggregate_columns[0])
+
+            with self.profiler.phase(label, 'write'):
+                deltas.to_csv(
+                    os.path.join(
+                        self.export_folder,
+                        self.export_file))
 
     def visualize(self, aggregate_column=None, aggregate_function=None, display_column=None,
                   excludes=[], enum_maps={}, cols_to_ignore=[]):
@@ -208,135 +225,255 @@ class BaseCompare:
                 print("Warning: %s not found. Skipping..." % feature_file)
                 continue
 
-            base_df = read_csv(base_file, index_col=0)
-            feature_df = read_csv(feature_file, index_col=0)
-
-            base_df = self.intersect_rows(base_df, feature_df)
-            feature_df = self.intersect_rows(feature_df, base_df)
-
-            for col in base_df.columns:
-                if base_df[col].isnull().all():
-                    base_df.drop(col, axis=1, inplace=True)
-            for col in feature_df.columns:
-                if feature_df[col].isnull().all():
-                    feature_df.drop(col, axis=1, inplace=True)
-
-            cols = sorted(list(set(base_df.columns) & set(feature_df.columns)))
-            cols = remove_columns(cols)
-            n_cols = max(len(cols), 1)
-
-            groups = [None]
-            if display_columns:
-                base_df = base_characteristics_df.join(base_df, how='right')
-                feature_df = feature_characteristics_df.join(feature_df, how='right')
-
-                for col, enum_map in enum_maps.items():
-                    if col in display_columns:
-                        for df in [base_df, feature_df]:
-                            df[col] = df[col].map(enum_map)
-
-                groups = list(base_df[display_columns[0]].unique())
-            n_groups = max(len(groups), 1)
-
-            vertical_spacing = 0.3 / n_cols
-            fig = make_subplots(
-                rows=n_cols,
-                cols=n_groups,
-                subplot_titles=groups * n_cols,
-                row_titles=[
-                    f'<b>{f}</b>' for f in cols],
-                vertical_spacing=vertical_spacing)
-
-            nrow = 0
-            for col in cols:
-                nrow += 1
-                for group in groups:
-                    ncol = groups.index(group) + 1
-                    showlegend = False
-                    if ncol == 1 and nrow == 1:
-                        showlegend = True
-
-                    x = base_df.copy()
-                    y = feature_df.copy()
-
-                    if group:
-                        x = x.loc[x[display_columns[0]] == group, :]
-                        y = y.loc[y[display_columns[0]] == group, :]
-
-                    if aggregate_function:
-                        x = x.assign(count=1)
-                        sizes = x.groupby(aggregate_columns)[['count']].sum().reset_index()
-
-                        if aggregate_function == 'sum':
-                            x = x.groupby(aggregate_columns).sum().reset_index()
-                            y = y.groupby(aggregate_columns).sum().reset_index()
-                        elif aggregate_function == 'mean':
-                            x = x.groupby(aggregate_columns).mean().reset_index()
-                            y = y.groupby(aggregate_columns).mean().reset_index()
-
-                        for agg_col in sorted(list(x[aggregate_columns[0]].unique())):
-                            x_c = x[x[aggregate_columns[0]] == agg_col]
-                            y_c = y[y[aggregate_columns[0]] == agg_col]
-                            s_c = sizes[sizes[aggregate_columns[0]] == agg_col]
-                            fig.add_trace(go.Scatter(x=x_c[col],
-                                                     y=y_c[col],
-                                                     marker=dict(size=s_c['count'],
-                                                                 line=dict(width=1.5,
-                                                                           color='DarkSlateGrey')),
-                                                     mode='markers',
-                                                     text=s_c['count'],
-                                                     name=agg_col,
-                                                     legendgroup=agg_col,
-                                                     showlegend=False),
-                                          row=nrow, col=ncol)
-                    else:
-                        n_colors = 1
-                        colors = px.colors.sample_colorscale('Viridis', [0.0])
-                        if 'color_index' in y.columns.values:
-                            n_colors = max(2, len(list(set(y['color_index']))))
-                            colors = px.colors.sample_colorscale('Viridis', [n/(n_colors - 1) for n in range(n_colors)])
-
-                        color = [colors[0] for i in y[col]]
-                        if 'color_index' in y.columns.values:
-                            color = [colors[i] for i in y['color_index']]
-                        fig.add_trace(go.Scatter(x=x[col],
-                                                 y=y[col],
-                                                 marker=dict(size=12,
-                                                             color=color,
-                                                             line=dict(width=1.5,
-                                                                       color='DarkSlateGrey')),
-                                                 mode='markers',
-                                                 text=x.index,
-                                                 name='',
-                                                 legendgroup=col,
-                                                 showlegend=False),
-                                      row=nrow, col=ncol)
-
-                    min_value, max_value = get_min_max(x[col], y[col], 0, 0)
-                    add_error_lines(fig, showlegend, nrow, ncol, min_value, max_value)
-                    fig.update_xaxes(title_text='base', row=nrow, col=ncol)
-                    fig.update_yaxes(title_text='feature', row=nrow, col=ncol)
-
-            fig['layout'].update(template='plotly_white')
-            fig.update_layout(width=800 * n_groups, height=600 * n_cols, autosize=False, font=dict(size=12))
-
-            # Re-locate row titles above plots
-            increment = (1/n_cols/2)*0.95
-            for i in fig['layout']['annotations']:
-                text = i['text'].replace('<b>', '').replace('</b>', '')
-                if text in cols:
-                    i['textangle'] = 0
-                    i['x'] = 0
-                    i['y'] += increment
-
-            basename, ext = os.path.splitext(file)
-            filename = '{basename}.html'.format(basename=basename)
-            if self.export_file:
-                filename = self.export_file
+            label = 'visualize: %s' % file
+            with self.profiler.file(label):
+                with self.profiler.phase(label, 'read'):
+                    base_df = read_csv(base_file, index_col=0)
+                    feature_df = read_csv(feature_file, index_col=0)
+
+                with self.profiler.phase(label, 'align'):
+                    base_df = self.intersect_rows(base_df, feature_df)
+                    feature_df = self.intersect_rows(feature_df, base_df)
+
+                    for col in base_df.columns:
+                        if base_df[col].isnull().all():
+                            base_df.drop(col, axis=1, inplace=True)
+                    for col in feature_df.columns:
+                        if feature_df[col].isnull().all():
+                            feature_df.drop(col, axis=1, inplace=True)
+
+                    cols = sorted(list(set(base_df.columns) & set(feature_df.columns)))
+                    cols = remove_columns(cols)
+                    n_cols = max(len(cols), 1)
+
+                    groups = [None]
+                    if display_columns:
+                        base_df = base_characteristics_df.join(base_df, how='right')
+                        feature_df = feature_characteristics_df.join(feature_df, how='right')
+
+                        for col, enum_map in enum_maps.items():
+                            if col in display_columns:
+                                for df in [base_df, feature_df]:
+                                    df[col] = df[col].map(enum_map)
+
+                        groups = list(base_df[display_columns[0]].unique())
+                    n_groups = max(len(groups), 1)
+
+                with self.profiler.phase(label, 'render'):
+                    vertical_spacing = 0.3 / n_cols
+                    fig = make_subplots(
+                        rows=n_cols,
+                        cols=n_groups,
+                        subplot_titles=groups * n_cols,
+                        row_titles=[
+                            f'<b>{f}</b>' for f in cols],
+                        vertical_spacing=vertical_spacing)
+
+                    nrow = 0
+                    for col in cols:
+                        nrow += 1
+                        for group in groups:
+                            ncol = groups.index(group) + 1
+                            showlegend = False
+                            if ncol == 1 and nrow == 1:
+                                showlegend = True
+
+                            x = base_df.copy()
+                            y = feature_df.copy()
+
+                            if group:
+                                x = x.loc[x[display_columns[0]] == group, :]
+                                y = y.loc[y[display_columns[0]] == group, :]
+
+                            if aggregate_function:
+                                x = x.assign(count=1)
+                                sizes = x.groupby(aggregate_columns)[['count']].sum().reset_index()
+
+                                if aggregate_function == 'sum':
+                                    x = x.groupby(aggregate_columns).sum().reset_index()
+                                    y = y.groupby(aggregate_columns).sum().reset_index()
+                                elif aggregate_function == 'mean':
+                                    x = x.groupby(aggregate_columns).mean().reset_index()
+                                    y = y.groupby(aggregate_columns).mean().reset_index()
+
+                                for agg_col in sorted(list(x[aggregate_columns[0]].unique())):
+                                    x_c = x[x[aggregate_columns[0]] == agg_col]
+                                    y_c = y[y[aggregate_columns[0]] == agg_col]
+                                    s_c = sizes[sizes[aggregate_columns[0]] == agg_col]
+                                    fig.add_trace(go.Scatter(x=x_c[col],
+                                                             y=y_c[col],
+                                                             marker=dict(size=s_c['count'],
+                                                                         line=dict(width=1.5,
+                                                                                   color='DarkSlateGrey')),
+                                                             mode='markers',
+                                                             text=s_c['count'],
+                                                             name=agg_col,
+                                                             legendgroup=agg_col,
+                                                             showlegend=False),
+                                                  row=nrow, col=ncol)
+                            else:
+                                n_colors = 1
+                                colors = px.colors.sample_colorscale('Viridis', [0.0])
+                                if 'color_index' in y.columns.values:
+                                    n_colors = max(2, len(list(set(y['color_index']))))
+                                    colors = px.colors.sample_colorscale('Viridis', [n/(n_colors - 1) for n in range(n_colors)])
+
+                                color = [colors[0] for i in y[col]]
+                                if 'color_index' in y.columns.values:
+                                    color = [colors[i] for i in y['color_index']]
+                                fig.add_trace(go.Scatter(x=x[col],
+                                                         y=y[col],
+                                                         marker=dict(size=12,
+                                                                     color=color,
+                                                                     line=dict(width=1.5,
+                                                                               color='DarkSlateGrey')),
+                                                         mode='markers',
+                                                         text=x.index,
+                                                         name='',
+                                                         legendgroup=col,
+                                                         showlegend=False),
+                                              row=nrow, col=ncol)
+
+                            min_value, max_value = get_min_max(x[col], y[col], 0, 0)
+                            add_error_lines(fig, showlegend, nrow, ncol, min_value, max_value)
+                            fig.update_xaxes(title_text='base', row=nrow, col=ncol)
+                            fig.update_yaxes(title_text='feature', row=nrow, col=ncol)
+
+                    fig['layout'].update(template='plotly_white')
+                    fig.update_layout(width=800 * n_groups, height=600 * n_cols, autosize=False, font=dict(size=12))
+
+                    # Re-locate row titles above plots
+                    increment = (1/n_cols/2)*0.95
+                    for i in fig['layout']['annotations']:
+                        text = i['text'].replace('<b>', '').replace('</b>', '')
+                        if text in cols:
+                            i['textangle'] = 0
+                            i['x'] = 0
+                            i['y'] += increment
+
+                with self.profiler.phase(label, 'write'):
+                    basename, ext = os.path.splitext(file)
+                    filename = '{basename}.html'.format(basename=basename)
+                    if self.export_file:
+                        filename = self.export_file
+
+                    plotly.offline.plot(fig,
+                                        filename=os.path.join(self.export_folder, '{filename}'.format(filename=filename)),
+                                        auto_open=False)
+
+    def timeseries(self, num_workers=None, chunk_size=10000):
+        # Compares results_timeseries* files in two trees of run directories (e.g., run_simulation.rb output
+        # folders), one home pair per worker process. Per-column metrics are written to timeseries.csv and the
+        # worst column per home/file to timeseries_summary.csv, ranked by CV(RMSE).
+        files = get_timeseries_files(self.base_folder)
+        jobs = []
+        for file in files:
+            feature_file = os.path.join(self.feature_folder, file)
+            if not os.path.exists(feature_file):
+                print("Warning: %s not found. Skipping..." % feature_file)
+                continue
+            jobs.append((file, os.path.join(self.base_folder, file), feature_file, chunk_size))
+
+        label = 'timeseries'
+        with self.profiler.file(label):
+            with self.profiler.phase(label, 'diff'):
+                rows = []
+                with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                    for file_rows in executor.map(compare_timeseries_files, jobs):
+                        rows += file_rows
+
+            with self.profiler.phase(label, 'write'):
+                df = pd.DataFrame(rows, columns=['file', 'column'] + TIMESERIES_METRICS + ['error'])
+                df.to_csv(os.path.join(self.export_folder, 'timeseries.csv'), index=False)
+
+                summary = []
+                for file, file_df in df.groupby('file', sort=False):
+                    errors = file_df['error'].dropna()
+                    row = {'file': file, 'error': errors.iloc[0] if len(errors) > 0 else None}
+                    for metric in TIMESERIES_METRICS:
+                        values = file_df[metric].abs()
+                        if values.notna().any():
+                            worst = values.idxmax()
+                            row[metric] = file_df.loc[worst, metric]
+                            row[f'{metric} column'] = file_df.loc[worst, 'column']
+                    summary.append(row)
+                summary_df = pd.DataFrame(summary, columns=['file'] + [c for m in TIMESERIES_METRICS for c in [m, f'{m} column']] + ['error'])
+                summary_df = summary_df.sort_values(['CV(RMSE) (%)', 'NMBE (%)'], key=lambda s: s.abs(), ascending=False, na_position='last')
+                summary_df.to_csv(os.path.join(self.export_folder, 'timeseries_summary.csv'), index=False)
+
+    def aggregate(self, aggregate_columns=[], aggregate_function='sum', percentiles=[10, 50, 90], enum_maps={},
+                  num_workers=None, relative_accuracy=0.01):
+        # Like results() with an aggregate_function, but for results split into shards (results_output<suffix>.csv
+        # with results_characteristics<suffix>.csv, or a single results_characteristics.csv) that are each
+        # processed by a worker process. Groups can use multiple characteristics columns, and percentiles of the
+        # per-simulation (feature - base) deltas are added. Counts, sums, and means are exact. Percentiles are defined
+        # as in np.percentile (linear interpolation between adjacent ranks), with each ranked delta estimated within
+        # relative_accuracy. Homes with missing characteristics are kept in an 'n/a' group.
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        suffixes = get_shard_suffixes(self.base_folder)
+        jobs = []
+        for suffix in suffixes:
+            if not os.path.exists(os.path.join(self.feature_folder, f'results_output{suffix}.csv')):
+                print("Warning: results_output%s.csv not found in %s. Skipping..." % (suffix, self.feature_folder))
+                continue
+            jobs.append((self.base_folder, self.feature_folder, suffix, aggregate_columns, enum_maps, gamma))
+
+        label = 'aggregate'
+        with self.profiler.file(label):
+            with self.profiler.phase(label, 'aggregate'):
+                state = None
+                with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                    for shard_state in executor.map(get_shard_state, jobs):
+                        state = shard_state if state is None else merge_shard_states(state, shard_state)
+
+            if state is None:
+                print("Warning: No results_output*.csv shards found in %s." % self.base_folder)
+                return
+
+            with self.profiler.phase(label, 'write'):
+                group_columns = list(state['n'].index.names)
+                base_df = state['base_sum'].where(state['base_count'] > 0)
+                feature_df = state['feature_sum'].where(state['feature_count'] > 0)
+                if aggregate_function == 'mean':
+                    base_df = base_df / state['base_count']
+                    feature_df = feature_df / state['feature_count']
+
+                # Write aggregate results df, in the same layout as results()
+                deltas = pd.DataFrame()
+                deltas['base'] = to_long(base_df)
+                deltas['feature'] = to_long(feature_df)
+                deltas['diff'] = deltas['feature'] - deltas['base']
+                deltas_non_zero = deltas[deltas['base'] != 0].index
+                deltas.loc[deltas_non_zero, '% diff'] = (100 * (deltas.loc[deltas_non_zero, 'diff'] /
+                                                         deltas.loc[deltas_non_zero, 'base']))
+                # Merge on columns rather than join on the index so that missing characteristics (NaN) groups match
+                index_names = group_columns + ['enduse']
+                deltas = deltas.reset_index().merge(get_sketch_percentiles(state['sketch'], gamma, percentiles).reset_index(),
+                                                    how='left', on=index_names).set_index(index_names)
+                deltas = deltas.astype(float).round(2)
+                if aggregate_columns:
+                    deltas.reset_index(level=aggregate_columns, inplace=True)
+                else:
+                    deltas.reset_index(level=group_columns[0], drop=True, inplace=True)
+                deltas.index.name = 'enduse'
+                deltas = deltas.astype(object).fillna('n/a')
+                sims_df = pd.DataFrame({'base': int(state['n'].sum()),
+                                        'feature': int(state['n'].sum()),
+                                        'diff': 'n/a',
+                                        '% diff': 'n/a'},
+                                       index=['simulation_count'])
+                for percentile in percentiles:
+                    sims_df[f'diff p{percentile}'] = 'n/a'
+                sims_df[aggregate_columns] = 'n/a'
+                deltas = pd.concat([sims_df, deltas])
+                for group in reversed(aggregate_columns):
+                    first_col = deltas.pop(group)
+                    deltas.insert(0, group, first_col)
 
-            plotly.offline.plot(fig,
-                                filename=os.path.join(self.export_folder, '{filename}'.format(filename=filename)),
-                                auto_open=False)
+                filename = self.export_file
+                if not filename:
+                    filename = '_'.join(['results_output'] + aggregate_columns) + '.csv'
+                deltas.to_csv(os.path.join(self.export_folder, filename))
 
 
 def read_csv(csv_file_path, **kwargs) -> pd.DataFrame:
@@ -345,6 +482,255 @@ def read_csv(csv_file_path, **kwargs) -> pd.DataFrame:
     return df
 
 
+TIMESERIES_METRICS = ['NMBE (%)', 'CV(RMSE) (%)', 'max abs diff', 'peak shift (timesteps)']
+
+
+def get_timeseries_files(folder):
+    """Get the paths, relative to folder, of all results_timeseries* files in a tree of run directories."""
+    files = []
+    for root, _, filenames in os.walk(folder):
+        for filename in filenames:
+            if filename.startswith('results_timeseries') and filename.endswith(('.csv', '.json', '.msgpack')):
+                files.append(os.path.relpath(os.path.join(root, filename), folder))
+    return sorted(files)
+
+
+class TimeseriesReader:
+    def __init__(self, path):
+        """Reads numeric columns of a results_timeseries file (csv, csv_dview, json, or msgpack).
+
+        CSV files are parsed once, in chunks of rows, so only one chunk of the requested columns is held in
+        memory. JSON/msgpack files must be parsed in full, but values are only converted to arrays when requested.
+        """
+        self.path = path
+        self.data = None
+        if path.endswith('.csv'):
+            with open(path) as f:
+                first_line = f.readline()
+                if first_line.startswith('wxDVFileHeaderVer.1'):
+                    self.skiprows = [0, 2, 3, 4]  # DView header rows
+                else:
+                    self.skiprows = [1]  # Units row
+            names = pd.read_csv(path, skiprows=self.skiprows, nrows=0).columns
+            self.columns = [c for c in names if not c.startswith('Time')]
+        else:
+            if path.endswith('.json'):
+                with open(path) as f:
+                    h = json.load(f)
+            else:
+                import msgpack
+                with open(path, 'rb') as f:
+                    h = msgpack.unpack(f)
+            self.data = {}
+            for group, values in h.items():
+                if isinstance(values, dict):
+                    for name, value in values.items():
+                        self.data[f'{group}: {name}'] = value
+            self.columns = list(self.data.keys())
+
+    def iter_chunks(self, columns, chunk_size):
+        """Yield (timesteps x columns) float arrays of up to chunk_size timesteps."""
+        if self.data is None:
+            for df in pd.read_csv(self.path, skiprows=self.skiprows, usecols=columns, chunksize=chunk_size):
+                yield df[columns].to_numpy(dtype=float)
+            return
+        values = np.column_stack([np.asarray(self.data[col], dtype=float) for col in columns])
+        for i in range(0, values.shape[0], chunk_size):
+            yield values[i:i + chunk_size]
+
+
+class TimeseriesMetrics:
+    """Accumulates the metrics of each column over chunks of timesteps of base and feature arrays."""
+
+    def __init__(self, num_columns):
+        self.n = 0
+        self.base_sum = np.zeros(num_columns)
+        self.diff_sum = np.zeros(num_columns)
+        self.diff_sq_sum = np.zeros(num_columns)
+        self.max_abs_diff = np.full(num_columns, -np.inf)
+        self.base_max = np.full(num_columns, -np.inf)
+        self.base_argmax = np.zeros(num_columns, dtype=np.int64)
+        self.feature_max = np.full(num_columns, -np.inf)
+        self.feature_argmax = np.zeros(num_columns, dtype=np.int64)
+
+    @staticmethod
+    def _update_max(max_values, argmax, values, offset):
+        # Keep the first timestep of the maximum, as np.argmax does
+        chunk_argmax = values.argmax(axis=0)
+        chunk_max = values[chunk_argmax, np.arange(values.shape[1])]
+        greater = chunk_max > max_values
+        max_values[greater] = chunk_max[greater]
+        argmax[greater] = chunk_argmax[greater] + offset
+
+    def add(self, base, feature):
+        diff = feature - base
+        self.base_sum += base.sum(axis=0)
+        self.diff_sum += diff.sum(axis=0)
+        self.diff_sq_sum += (diff ** 2).sum(axis=0)
+        self.max_abs_diff = np.maximum(self.max_abs_diff, np.abs(diff).max(axis=0))
+        self._update_max(self.base_max, self.base_argmax, base, self.n)
+        self._update_max(self.feature_max, self.feature_argmax, feature, self.n)
+        self.n += base.shape[0]
+
+    def get(self):
+        """Get a dict of metric name to array of values per column; NMBE and CV(RMSE) are NaN when the base mean is zero."""
+        base_mean = self.base_sum / self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nmbe = np.where(base_mean != 0, 100 * self.diff_sum / (self.n * base_mean), np.nan)
+            cvrmse = np.where(base_mean != 0, 100 * np.sqrt(self.diff_sq_sum / self.n) / np.abs(base_mean), np.nan)
+        return {'NMBE (%)': nmbe,
+                'CV(RMSE) (%)': cvrmse,
+                'max abs diff': self.max_abs_diff,
+                'peak shift (timesteps)': self.feature_argmax - self.base_argmax}
+
+
+def compare_timeseries_files(args):
+    """Compare a base and feature timeseries file; args is a (file, base path, feature path, chunk_size) tuple.
+
+    Returns:
+        A list of dicts, one per column, with the metrics (or an error)
+    """
+    file, base_path, feature_path, chunk_size = args
+    try:
+        base_reader = TimeseriesReader(base_path)
+        feature_reader = TimeseriesReader(feature_path)
+    except Exception as e:
+        return [{'file': file, 'column': None, 'error': str(e)}]
+
+    feature_columns = set(feature_reader.columns)
+    columns = [c for c in base_reader.columns if c in feature_columns]
+    if not columns:
+        return []
+
+    metrics = TimeseriesMetrics(len(columns))
+    n_base = n_feature = 0
+    for base, feature in itertools.zip_longest(base_reader.iter_chunks(columns, chunk_size),
+                                               feature_reader.iter_chunks(columns, chunk_size)):
+        n_base += 0 if base is None else base.shape[0]
+        n_feature += 0 if feature is None else feature.shape[0]
+        if base is None or feature is None or base.shape != feature.shape:
+            continue  # Keep counting timesteps for the error below
+        metrics.add(base, feature)
+    if n_base != n_feature:
+        return [{'file': file, 'column': None, 'error': 'Number of timesteps differ (%d vs %d).' % (n_base, n_feature)}]
+    if n_base == 0:
+        return []
+
+    values = metrics.get()
+    return [{'file': file, 'column': col, **{metric: values[metric][j] for metric in TIMESERIES_METRICS}}
+            for j, col in enumerate(columns)]
+
+
+def get_shard_suffixes(folder):
+    """Get the suffixes of the results_output<suffix>.csv shards in a folder (e.g., '' for results_output.csv)."""
+    suffixes = []
+    for file in sorted(os.listdir(folder)):
+        if file.startswith('results_output') and file.endswith('.csv'):
+            suffixes.append(file[len('results_output'):-len('.csv')])
+    return suffixes
+
+
+def get_shard_state(args):
+    """Get the mergeable partial aggregation state of a shard; args is a (base folder, feature folder, suffix,
+    aggregate_columns, enum_maps, gamma) tuple.
+
+    Returns:
+        A dict of simulation counts ('n'; indexed by group), sums and non-null counts of the base and feature
+        results ('base_sum', 'base_count', 'feature_sum', 'feature_count'; indexed by group, one column per enduse),
+        and the log-bucketed sketch of the (feature - base) deltas ('sketch'; counts indexed by group, enduse,
+        sign, and bucket)
+    """
+    base_folder, feature_folder, suffix, aggregate_columns, enum_maps, gamma = args
+    base_df = read_csv(os.path.join(base_folder, f'results_output{suffix}.csv'), index_col=0)
+    feature_df = read_csv(os.path.join(feature_folder, f'results_output{suffix}.csv'), index_col=0)
+    base_df = BaseCompare.intersect_rows(base_df, feature_df).select_dtypes('number')
+    feature_df = BaseCompare.intersect_rows(feature_df, base_df).select_dtypes('number')
+    cols = sorted(set(base_df.columns) & set(feature_df.columns))
+    base_df = base_df[cols]
+    feature_df = feature_df.loc[base_df.index, cols]
+
+    if aggregate_columns:
+        characteristics_file = os.path.join(base_folder, f'results_characteristics{suffix}.csv')
+        if not os.path.exists(characteristics_file):
+            characteristics_file = os.path.join(base_folder, 'results_characteristics.csv')
+        group_df = read_csv(characteristics_file, index_col=0)[aggregate_columns].reindex(base_df.index)
+        for col, enum_map in enum_maps.items():
+            if col in aggregate_columns:
+                group_df[col] = group_df[col].map(enum_map)
+        group_columns = aggregate_columns
+    else:
+        group_df = pd.DataFrame({'all': 'all'}, index=base_df.index)
+        group_columns = ['all']
+    groups = [group_df[col] for col in group_columns]
+
+    # Sketch of the deltas: bucket k holds values with gamma^(k-1) < |delta| <= gamma^k
+    deltas = (feature_df - base_df).join(group_df).melt(id_vars=group_columns, var_name='enduse', value_name='delta')
+    deltas = deltas.dropna(subset=['delta'])
+    values = deltas['delta'].to_numpy(dtype=float)
+    buckets = np.zeros(len(values), dtype=np.int64)
+    non_zero = values != 0
+    buckets[non_zero] = np.ceil(np.log(np.abs(values[non_zero])) / np.log(gamma))
+    deltas['sign'] = np.sign(values).astype(np.int64)
+    deltas['bucket'] = buckets
+
+    # Homes with missing characteristics are kept (as a NaN group), like the simulation count in results()
+    return {'n': group_df.groupby(groups, dropna=False).size(),
+            'base_sum': base_df.groupby(groups, dropna=False).sum(),
+            'base_count': base_df.groupby(groups, dropna=False).count(),
+            'feature_sum': feature_df.groupby(groups, dropna=False).sum(),
+            'feature_count': feature_df.groupby(groups, dropna=False).count(),
+            'sketch': deltas.groupby(group_columns + ['enduse', 'sign', 'bucket'], dropna=False).size()}
+
+
+def merge_shard_states(state1, state2):
+    """Merge two partial aggregation states (see get_shard_state); the result is the same as for a single shard."""
+    merged = {}
+    for key, value in state1.items():
+        df = pd.concat([value, state2[key]])
+        merged[key] = df.groupby(level=list(range(df.index.nlevels)), dropna=False).sum()
+    return merged
+
+
+def to_long(df):
+    """Convert a (group x enduse) DataFrame to a Series indexed by (group..., enduse), keeping NaNs."""
+    s = df.T.unstack()
+    s.index = s.index.set_names(list(df.index.names) + ['enduse'])
+    return s
+
+
+def get_sketch_percentiles(sketch, gamma, percentiles):
+    """Get percentiles of the deltas from a merged sketch (see get_shard_state).
+
+    Percentiles are defined as in np.percentile (linear interpolation between the values at the adjacent ranks
+    around percentile / 100 * (count - 1)), with each value estimated by the midpoint of its bucket.
+
+    Returns:
+        A DataFrame indexed by (group..., enduse) with a 'diff p<percentile>' column per percentile
+    """
+    index_names = list(sketch.index.names[:-2])
+    df = sketch.rename('count').reset_index()
+    df['value'] = df['sign'] * 2 * np.power(gamma, df['bucket'].astype(float)) / (gamma + 1)
+    df.loc[df['sign'] == 0, 'value'] = 0.0
+    df = df.sort_values(index_names + ['value'])
+    grouped = df.groupby(index_names, sort=False, dropna=False)
+    cum_count = grouped['count'].cumsum()
+    total = grouped['count'].transform('sum')
+
+    def get_value_at(rank):
+        # Value of the (0-based) rank-th smallest delta of each group
+        return df[cum_count > rank].groupby(index_names, sort=False, dropna=False)['value'].first()
+
+    result = pd.DataFrame(index=pd.MultiIndex.from_frame(df[index_names].drop_duplicates()))
+    for percentile in percentiles:
+        rank = percentile / 100 * (total - 1)
+        lower_rank = np.floor(rank)
+        fraction = (rank - lower_rank).groupby([df[name] for name in index_names], sort=False, dropna=False).first()
+        lower = get_value_at(lower_rank)
+        upper = get_value_at(np.minimum(lower_rank + 1, total - 1))
+        result[f'diff p{percentile}'] = lower + fraction * (upper - lower)
+    return result
+
+
 if __name__ == '__main__':
 
     default_base_folder = 'workflow/tests/base_results'
@@ -358,13 +744,23 @@ if __name__ == '__main__':
     parser.add_argument('-e', '--export_folder', default=default_export_folder, help='Path of the export folder.')
     parser.add_argument('-x', '--export_file', help='Path of the export file.')
     parser.add_argument('-a', '--actions', action='append', choices=actions, help='Method to call.')
+    parser.add_argument('-p', '--profile', action='store_true', help='Write per-file/per-phase timings and peak RSS to compare_profile.json in the export folder.')
+    parser.add_argument('--profile_stats', action='store_true', help='Also write cProfile stats for the slowest file to compare_profile.pstats.')
+    parser.add_argument('--profile_memory', action='store_true', help='Also trace the peak allocated memory per file/phase (slows down the run, so timings are inflated).')
+    parser.add_argument('-n', '--num_workers', type=int, help='Number of worker processes for the timeseries and aggregate actions (default: number of CPUs).')
+    parser.add_argument('--chunk_size', type=int, default=10000, help='Number of timeseries rows (timesteps) read at a time for the timeseries action.')
+    parser.add_argument('-g', '--aggregate_columns', action='append', default=[], help='Characteristics column to group by for the aggregate action; can be called multiple times.')
+    parser.add_argument('--aggregate_function', default='sum', choices=['sum', 'mean'], help='Aggregate function for the aggregate action.')
+    parser.add_argument('--percentiles', type=int, nargs='+', default=[10, 50, 90], help='Percentiles of the deltas for the aggregate action.')
     args = parser.parse_args()
     print(args)
 
     if not os.path.exists(args.export_folder):
         os.makedirs(args.export_folder)
 
-    compare = BaseCompare(args.base_folder, args.feature_folder, args.export_folder, args.export_file)
+    profiler = Profiler(enabled=args.profile or args.profile_stats or args.profile_memory, cprofile=args.profile_stats,
+                        trace_memory=args.profile_memory)
+    compare = BaseCompare(args.base_folder, args.feature_folder, args.export_folder, args.export_file, profiler)
 
     if args.actions is None:
         args.actions = []
@@ -374,3 +770,10 @@ if __name__ == '__main__':
             compare.results()
         elif action == 'visualize':
             compare.visualize()
+        elif action == 'timeseries':
+            compare.timeseries(args.num_workers, args.chunk_size)
+        elif action == 'aggregate':
+            compare.aggregate(args.aggregate_columns, args.aggregate_function, args.percentiles, num_workers=args.num_workers)
+
+    profiler.write(os.path.join(args.export_folder, 'compare_profile.json'),
+                   os.path.join(args.export_folder, 'compare_profile.pstats'))
@@ -0,0 +1,266 @@
+import os
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+
+# Attributes whose values are references to the id of another element
+REFERENCE_ATTRIBUTES = ['idref', 'sameas']
+
+
+class Node:
+    """Canonicalized HPXML element with a hash of its entire subtree."""
+    __slots__ = ['tag', 'attrs', 'text', 'children', 'hash', 'key']
+
+    def __init__(self, tag, attrs, text, children, key=None):
+        self.tag = tag
+        self.key = key  # Reference key, if the element is referenced by id
+        self.attrs = attrs
+        self.text = text
+        self.children = children
+
+        # Sibling order doesn't matter, so child hashes are sorted
+        h = hashlib.sha1()
+        h.update(tag.encode())
+        for k, v in attrs:
+            h.update(f'\x00{k}={v}'.encode())
+        h.update(f'\x01{text}'.encode())
+        for child_hash in sorted(child.hash for child in children):
+            h.update(child_hash)
+        self.hash = h.digest()
+
+
+def strip_namespace(tag):
+    return tag.split('}', 1)[-1]
+
+
+def get_owners(root):
+    """Map each id to the element it identifies (e.g., the Wall of a Wall/SystemIdentifier)."""
+    owners = {}
+
+    def walk(elem):
+        for child in elem:
+            if 'id' in child.attrib:
+                owners[child.attrib['id']] = elem
+            walk(child)
+
+    walk(root)
+    return owners
+
+
+def to_node(elem, keep_data_source, reference_keys=None, owner_keys=None):
+    """Convert an element to a Node, dropping ids and replacing references with their keys in reference_keys (or
+    dropping their values if None); owner_keys maps referenced elements to their keys."""
+    attrs = []
+    for k, v in elem.attrib.items():
+        k = strip_namespace(k)
+        if k == 'id':
+            continue
+        if k == 'dataSource' and not keep_data_source:
+            continue
+        if k in REFERENCE_ATTRIBUTES:
+            v = reference_keys.get(v, v) if reference_keys is not None else ''
+        attrs.append((k, v))
+    text = (elem.text or '').strip()
+    children = [to_node(child, keep_data_source, reference_keys, owner_keys) for child in elem]
+    return Node(strip_namespace(elem.tag), tuple(sorted(attrs)), text, children,
+                (owner_keys or {}).get(elem))
+
+
+def canonicalize(hpxml_path, keep_data_source=False):
+    """Parse an HPXML file into a Node tree that ignores namespaces, sibling order, id names, and (optionally)
+    the dataSource attributes added to defaulted values.
+
+    Ids are dropped and references to them are replaced by a key derived from the content of the referenced
+    element (its tag and the hash of its subtree without ids and reference values), so neither renaming ids nor
+    reordering/inserting elements is a difference. The key of a changed element also changes; diff_nodes
+    records which keys are paired so that references to changed elements aren't reported as differences
+    (see resolve_references).
+    """
+    root = ET.parse(hpxml_path).getroot()
+    reference_keys = {}
+    owner_keys = {}
+    for ref_id, owner in get_owners(root).items():
+        if owner not in owner_keys:
+            owner_keys[owner] = f'{strip_namespace(owner.tag)}:{to_node(owner, keep_data_source).hash.hex()[:16]}'
+        reference_keys[ref_id] = owner_keys[owner]
+    return to_node(root, keep_data_source, reference_keys, owner_keys)
+
+
+def get_key_paths(node, path, key_paths=None):
+    """Map the reference key of each referenced element in a Node tree to its path."""
+    if key_paths is None:
+        key_paths = {}
+    if node.key is not None:
+        key_paths.setdefault(node.key, path)
+    counts = {}
+    for child in node.children:
+        counts[child.tag] = counts.get(child.tag, 0) + 1
+        get_key_paths(child, f'{path}/{child.tag}[{counts[child.tag]}]', key_paths)
+    return key_paths
+
+
+def resolve_references(diffs, base, feature, paired_keys):
+    """Drop reference differences where the base and feature reference the same (paired) element, and replace
+    the reference keys of the remaining ones with the paths of the referenced elements."""
+    base_paths = get_key_paths(base, base.tag)
+    feature_paths = get_key_paths(feature, feature.tag)
+    resolved = []
+    for path, change, base_value, feature_value in diffs:
+        if '/@' in path and path.rsplit('/@', 1)[1] in REFERENCE_ATTRIBUTES:
+            if paired_keys.get(base_value) == feature_value:
+                continue
+            base_value = base_paths.get(base_value, base_value)
+            feature_value = feature_paths.get(feature_value, feature_value)
+        resolved.append((path, change, base_value, feature_value))
+    return resolved
+
+
+def diff_nodes(base, feature, path, paired_keys=None):
+    """Get the differences between two Node trees, pruning identical subtrees by hash.
+
+    Args:
+        paired_keys: Optional dict that is populated with the base => feature reference keys of the referenced
+                     elements that were paired up (i.e., changed)
+
+    Returns:
+        A list of (path, change, base value, feature value) tuples
+    """
+    if base.hash == feature.hash:
+        return []
+
+    diffs = []
+    if base.text != feature.text:
+        diffs.append((path, 'changed', base.text, feature.text))
+    base_attrs = dict(base.attrs)
+    feature_attrs = dict(feature.attrs)
+    for k in sorted(set(base_attrs) | set(feature_attrs)):
+        if base_attrs.get(k) != feature_attrs.get(k):
+            diffs.append((f'{path}/@{k}', 'changed', base_attrs.get(k), feature_attrs.get(k)))
+
+    # Group children by tag, keeping their (1-based) positions for the paths
+    tags = []
+    base_children = {}
+    feature_children = {}
+    for node, children in [(base, base_children), (feature, feature_children)]:
+        for child in node.children:
+            if child.tag not in tags:
+                tags.append(child.tag)
+            siblings = children.setdefault(child.tag, [])
+            siblings.append((len(siblings) + 1, child))
+
+    for tag in tags:
+        base_siblings = base_children.get(tag, [])
+        feature_siblings = feature_children.get(tag, [])
+
+        # Remove identical subtrees (regardless of position)
+        unmatched_hashes = {}
+        for _, child in base_siblings:
+            unmatched_hashes[child.hash] = unmatched_hashes.get(child.hash, 0) + 1
+        remaining_feature = []
+        for i, child in feature_siblings:
+            if unmatched_hashes.get(child.hash, 0) > 0:
+                unmatched_hashes[child.hash] -= 1
+            else:
+                remaining_feature.append((i, child))
+        remaining_base = []
+        for i, child in base_siblings:
+            if unmatched_hashes.get(child.hash, 0) > 0:
+                unmatched_hashes[child.hash] -= 1
+                remaining_base.append((i, child))
+
+        # Pair up the rest in order
+        for (_, base_child), (i, feature_child) in zip(remaining_base, remaining_feature):
+            if paired_keys is not None and base_child.key is not None:
+                paired_keys[base_child.key] = feature_child.key
+            diffs += diff_nodes(base_child, feature_child, f'{path}/{tag}[{i}]', paired_keys)
+        for i, _ in remaining_base[len(remaining_feature):]:
+            diffs.append((f'{path}/{tag}[{i}]', 'removed', None, None))
+        for i, _ in remaining_feature[len(remaining_base):]:
+            diffs.append((f'{path}/{tag}[{i}]', 'added', None, None))
+
+    return diffs
+
+
+def find_hpxml(folder, hpxml_name):
+    """Find an HPXML in a folder, either as <folder>/<name> or <folder>/<name w/o .xml>/run/in.xml."""
+    path = os.path.join(folder, hpxml_name)
+    if os.path.exists(path):
+        return path
+    path = os.path.join(folder, os.path.splitext(hpxml_name)[0], 'run', 'in.xml')
+    if os.path.exists(path):
+        return path
+    return None
+
+
+def diff_hpxmls(args):
+    """Diff a base and feature HPXML; args is a (name, base path, feature path, keep_data_source) tuple."""
+    hpxml_name, base_path, feature_path, keep_data_source = args
+    base = canonicalize(base_path, keep_data_source)
+    feature = canonicalize(feature_path, keep_data_source)
+    paired_keys = {}
+    diffs = diff_nodes(base, feature, base.tag, paired_keys)
+    return hpxml_name, resolve_references(diffs, base, feature, paired_keys)
+
+
+def get_changed_hpxmls(comparisons_folder, files):
+    """Get the HPXML names with any non-zero result delta in compare.py's exported results files."""
+    changed = set()
+    for file in files:
+        df = pd.read_csv(os.path.join(comparisons_folder, file), index_col=0)
+        df = df.apply(pd.to_numeric, errors='coerce')
+        changed |= set(df.index[(df.fillna(0) != 0).any(axis=1)])
+    return sorted(changed)
+
+
+if __name__ == '__main__':
+
+    default_comparisons_folder = 'workflow/tests/comparisons'
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--base_hpxml_folder', required=True, help='Path of the folder with the base HPXMLs (or run directories).')
+    parser.add_argument('-f', '--feature_hpxml_folder', required=True, help='Path of the folder with the feature HPXMLs (or run directories).')
+    parser.add_argument('-c', '--comparisons_folder', default=default_comparisons_folder, help='Path of the folder with the compare.py results deltas.')
+    parser.add_argument('-e', '--export_folder', help='Path of the export folder (default: the comparisons folder).')
+    parser.add_argument('-n', '--num_workers', type=int, default=os.cpu_count(), help='Number of worker processes.')
+    parser.add_argument('--keep_data_source', action='store_true', help='Treat changes to dataSource attributes as differences.')
+    args = parser.parse_args()
+
+    export_folder = args.export_folder or args.comparisons_folder
+    if not os.path.exists(export_folder):
+        os.makedirs(export_folder)
+
+    files = [file for file in sorted(os.listdir(args.comparisons_folder))
+             if file.startswith('results_') and file.endswith('.csv') and not file.endswith('_inputs.csv')]
+    hpxml_names = get_changed_hpxmls(args.comparisons_folder, files)
+
+    jobs = []
+    for hpxml_name in hpxml_names:
+        base_path = find_hpxml(args.base_hpxml_folder, hpxml_name)
+        feature_path = find_hpxml(args.feature_hpxml_folder, hpxml_name)
+        if base_path is None or feature_path is None:
+            print("Warning: %s not found in both HPXML folders. Skipping..." % hpxml_name)
+            continue
+        jobs.append((hpxml_name, base_path, feature_path, args.keep_data_source))
+
+    hpxml_diffs = {}
+    with ProcessPoolExecutor(max_workers=args.num_workers) as executor:
+        for hpxml_name, diffs in executor.map(diff_hpxmls, jobs, chunksize=max(1, len(jobs) // (4 * args.num_workers))):
+            hpxml_diffs[hpxml_name] = diffs
+
+    # Write all input differences
+    rows = [(hpxml_name,) + diff for hpxml_name, diffs in hpxml_diffs.items() for diff in diffs]
+    diffs_df = pd.DataFrame(rows, columns=['HPXML', 'path', 'change', 'base', 'feature'])
+    diffs_df.to_csv(os.path.join(export_folder, 'hpxml_diffs.csv'), index=False)
+
+    # Join changed input paths onto the result deltas
+    changed_inputs = {hpxml_name: '; '.join(diff[0] for diff in diffs) for hpxml_name, diffs in hpxml_diffs.items()}
+    for file in files:
+        df = pd.read_csv(os.path.join(args.comparisons_folder, file), index_col=0)
+        df['Changed Inputs'] = df.index.map(changed_inputs)
+        basename, ext = os.path.splitext(file)
+        df.to_csv(os.path.join(export_folder, f'{basename}_inputs{ext}'))
+
+    print("Diffed %d HPXMLs with changed results; %d input differences found." % (len(jobs), len(diffs_df)))
@@ -5,6 +5,15 @@ import pandas as pd
 
 # Combines two CSV files (that have potentially different column names).
 
+def merge_csv_files(csv1_path, csv2_path, merged_path):
+    df1 = pd.read_csv(csv1_path)
+    df2 = pd.read_csv(csv2_path)
+
+    df3 = pd.concat([df1, df2], ignore_index=True)
+
+    df3.to_csv(merged_path, index=False)
+
+
 if __name__ == "__main__":
 
     if len(sys.argv) != 4:
@@ -14,9 +23,4 @@ if __name__ == "__main__":
     csv2_path = os.path.abspath(sys.argv[2])
     merged_path = os.path.abspath(sys.argv[3])
 
-    df1 = pd.read_csv(csv1_path)
-    df2 = pd.read_csv(csv2_path)
-
-    df3 = pd.concat([df1, df2], ignore_index=True)
-
-    df3.to_csv(merged_path, index=False)
+    merge_csv_files(csv1_path, csv2_path, merged_path)
@@ -0,0 +1,146 @@
+import sys
+import json
+import time
+import pstats
+import cProfile
+import contextlib
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Records wall time, CPU time, and memory per file and per phase (e.g., read, align, diff, aggregate,
+# render, write) for the compare.py and print_diff.py tools. When disabled, all methods are no-ops.
+# Memory is measured with getrusage, which adds no overhead to the timings: the peak RSS of the process
+# at the end of each file/phase and how much the file/phase raised it. Since the peak RSS is a high-water
+# mark, a file/phase that allocates less than an earlier one shows no increase; trace_memory=True
+# additionally measures the peak memory allocated during each file/phase with tracemalloc (which
+# numpy/pandas allocations are reported to), at the cost of slowing down the run and inflating the
+# timings, so it is best done in a separate run.
+
+
+def get_peak_rss_mb():
+    """Get the peak resident set size of the process so far, in MB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak / 1024 / 1024  # bytes
+    return peak / 1024  # kB
+
+
+class Profiler:
+    def __init__(self, enabled=True, cprofile=False, trace_memory=False):
+        """
+        Args:
+            enabled: Whether to record anything
+            cprofile: Whether to run cProfile for each file and keep the stats of the slowest file
+            trace_memory: Whether to also trace the peak allocated memory of each file/phase (slow)
+        """
+        self.enabled = enabled
+        self.cprofile = cprofile
+        self.trace_memory = enabled and trace_memory
+        self.files = []
+        self.phases = []
+        self.slowest_file = None
+        self.slowest_wall_time = -1.0
+        self.slowest_stats = None
+        self.active = []  # Traced memory of the files/phases in progress, outermost first
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _update_peaks(self):
+        """Fold the traced peak since the last reset into all files/phases in progress and reset it."""
+        _, peak = tracemalloc.get_traced_memory()
+        for memory in self.active:
+            memory['peak'] = max(memory['peak'], peak)
+        tracemalloc.reset_peak()
+
+    def _start(self):
+        memory = None
+        if self.trace_memory:
+            self._update_peaks()
+            current, _ = tracemalloc.get_traced_memory()
+            memory = {'start': current, 'peak': current}
+            self.active.append(memory)
+        return time.perf_counter(), time.process_time(), get_peak_rss_mb(), memory
+
+    def _stop(self, start):
+        wall_start, cpu_start, rss_start, memory = start
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        rss = get_peak_rss_mb()
+        record = {'wall_time': round(wall_time, 6),
+                  'cpu_time': round(cpu_time, 6),
+                  'peak_rss_mb': None if rss is None else round(rss, 3),
+                  'peak_rss_increase_mb': None if rss is None else round(rss - rss_start, 3)}
+        if memory is not None:
+            self._update_peaks()
+            self.active.remove(memory)
+            record['peak_alloc_mb'] = round((memory['peak'] - memory['start']) / 1024 / 1024, 3)
+        return record
+
+    @contextlib.contextmanager
+    def file(self, file):
+        """Record the totals for processing a file."""
+        if not self.enabled:
+            yield
+            return
+
+        profile = cProfile.Profile() if self.cprofile else None
+        start = self._start()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            record = {'file': file, **self._stop(start)}
+            self.files.append(record)
+            if record['wall_time'] > self.slowest_wall_time:
+                self.slowest_file = file
+                self.slowest_wall_time = record['wall_time']
+                if profile:
+                    self.slowest_stats = pstats.Stats(profile)
+
+    @contextlib.contextmanager
+    def phase(self, file, phase):
+        """Record a phase (e.g., 'read') of processing a file."""
+        if not self.enabled:
+            yield
+            return
+
+        start = self._start()
+        try:
+            yield
+        finally:
+            self.phases.append({'file': file, 'phase': phase, **self._stop(start)})
+
+    def write(self, json_path, stats_path=None):
+        """Write the recorded times and memory to a JSON file and, if cProfile was used, the slowest file's stats to stats_path."""
+        if not self.enabled:
+            return
+
+        totals = {}
+        for record in self.phases:
+            total = totals.setdefault(record['phase'], {'wall_time': 0.0, 'cpu_time': 0.0})
+            total['wall_time'] = round(total['wall_time'] + record['wall_time'], 6)
+            total['cpu_time'] = round(total['cpu_time'] + record['cpu_time'], 6)
+            for key in ['peak_rss_increase_mb', 'peak_alloc_mb']:
+                if record.get(key) is not None:
+                    total[f'max_{key}'] = max(total.get(f'max_{key}', 0.0), record[key])
+
+        report = {'peak_rss_mb': get_peak_rss_mb(),
+                  'slowest_file': self.slowest_file,
+                  'phase_totals': totals,
+                  'files': self.files,
+                  'phases': self.phases}
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        if stats_path and self.slowest_stats is not None:
+            self.slowest_stats.dump_stats(stats_path)
@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import heapq
+import argparse
+import fnmatch
+import subprocess
+
+
+# Selects the subset of sample files/real homes to simulate based on the Ruby code each HPXML
+# file executed, as recorded in the coverage folder. Coverage is recorded by running the workflow
+# tests with the COVERAGE_DIR environment variable set, e.g.:
+#   COVERAGE_DIR=workflow/tests/coverage openstudio tasks.rb workflow_tests1
+# The resulting subset file can then be passed to the workflow tests via the TEST_SUBSET
+# environment variable, e.g.:
+#   TEST_SUBSET=workflow/tests/test_subset.txt openstudio tasks.rb workflow_tests1
+
+HPXML_DIRS = ['workflow/sample_files', 'workflow/real_homes']
+
+# Changed files matching these patterns can affect simulation results; if they are not
+# attributable to specific HPXML files via coverage, all HPXML files are selected. Files
+# listed explicitly take precedence over IGNORE_PATTERNS.
+SIMULATION_PATTERNS = ['BuildResidentialHPXML/*',
+                       'BuildResidentialScheduleFile/*',
+                       'HPXMLtoOpenStudio/*',
+                       'ReportSimulationOutput/*',
+                       'ReportUtilityBills/*',
+                       'weather/*',
+                       'workflow/run_simulation.rb',
+                       'workflow/tests/util.rb']
+
+# Changed files matching these patterns never affect simulation results.
+IGNORE_PATTERNS = ['*/tests/*',
+                   '*/measure.xml',
+                   '*.md']
+
+
+def read_coverage(coverage_folder):
+    """Read the per-HPXML coverage files.
+
+    Args:
+        coverage_folder: Folder of <hpxml name>.json files written by run_simulation.rb --coverage
+
+    Returns:
+        A dict of HPXML file name => dict of Ruby file path => set of executed line numbers.
+        Coverage from the 10x unit multiplier run is combined with the original run.
+    """
+    coverage = {}
+    for file in sorted(os.listdir(coverage_folder)):
+        name, ext = os.path.splitext(file)
+        if ext != '.json':
+            continue
+        if name.endswith('-10x'):
+            name = name[:-len('-10x')]
+
+        with open(os.path.join(coverage_folder, file)) as f:
+            file_coverage = json.load(f)
+
+        hpxml_coverage = coverage.setdefault(f'{name}.xml', {})
+        for rb_path, lines in file_coverage.items():
+            hpxml_coverage.setdefault(rb_path, set()).update(lines)
+
+    return coverage
+
+
+def get_impact_map(coverage):
+    """Map each Ruby file to the sorted list of HPXML files that executed it."""
+    impact_map = {}
+    for hpxml, hpxml_coverage in coverage.items():
+        for rb_path in hpxml_coverage:
+            impact_map.setdefault(rb_path, []).append(hpxml)
+    return {rb_path: sorted(hpxmls) for rb_path, hpxmls in sorted(impact_map.items())}
+
+
+def get_changed_lines(ref):
+    """Get the files and line numbers changed relative to the git ref (including uncommitted changes).
+
+    Returns:
+        The changed lines as returned by parse_changed_lines()
+    """
+    result = subprocess.run(
+        ["git", "diff", "-U0", "--no-color", "--no-ext-diff", ref],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return parse_changed_lines(result.stdout)
+
+
+def parse_changed_lines(diff):
+    """Parse the output of git diff -U0 into the changed files and line numbers.
+
+    Line numbers are those of the old version of each file, i.e., the version that coverage was recorded
+    for. Modified and deleted lines are included; for inserted lines, the lines before and after the
+    insertion are included.
+
+    Returns:
+        A dict of repo-relative file path => set of changed line numbers, or None if the whole file is
+        considered changed (e.g., binary or new files)
+    """
+    changed = {}
+    path = None
+    in_header = False
+    for line in diff.splitlines():
+        if line.startswith('diff --git '):
+            path = line.split(' b/', 1)[-1]
+            changed[path] = None
+            in_header = True
+        elif in_header and line.startswith('--- '):
+            # The old path, if the file existed (e.g., renames); new files are entirely changed
+            path = line[len('--- a/'):] if line.startswith('--- a/') else None
+            if path is not None:
+                changed.setdefault(path, None)
+        elif line.startswith('@@ ') and path is not None:
+            in_header = False
+            old_range = line.split(' ')[1][1:]  # e.g., '-12,3' => '12,3'
+            start, _, count = old_range.partition(',')
+            start, count = int(start), int(count) if count else 1
+            if changed[path] is None:
+                changed[path] = set()
+            if count > 0:
+                changed[path].update(range(start, start + count))
+            else:
+                changed[path].update([start, start + 1])
+        elif line.startswith('@@ '):
+            in_header = False
+    return changed
+
+
+def get_impacted_hpxmls(coverage, changed_lines):
+    """Get the HPXML files impacted by the changed files.
+
+    Args:
+        coverage: Per-HPXML coverage as returned by read_coverage()
+        changed_lines: Dict of repo-relative paths of changed files => set of changed line numbers (or None
+                       if the whole file is considered changed), as returned by get_changed_lines()
+
+    Returns:
+        A tuple of (set of impacted HPXML file names, list of changed files that could not be
+        attributed to specific HPXML files and therefore impact all of them).
+    """
+    impact_map = get_impact_map(coverage)
+
+    impacted = set()
+    unattributed = []
+    for changed_file, lines in changed_lines.items():
+        changed_file = changed_file.replace('\\', '/')
+        if os.path.dirname(changed_file) in HPXML_DIRS:
+            if changed_file.endswith('.xml'):
+                impacted.add(os.path.basename(changed_file))
+            continue
+        if changed_file in impact_map:
+            for hpxml in impact_map[changed_file]:
+                if lines is None or not lines.isdisjoint(coverage[hpxml][changed_file]):
+                    impacted.add(hpxml)
+            continue
+        if changed_file in SIMULATION_PATTERNS:
+            unattributed.append(changed_file)  # Listed explicitly, e.g. workflow/tests/util.rb
+            continue
+        if any(fnmatch.fnmatch(changed_file, pattern) for pattern in IGNORE_PATTERNS):
+            continue
+        if any(fnmatch.fnmatch(changed_file, pattern) for pattern in SIMULATION_PATTERNS):
+            unattributed.append(changed_file)
+
+    if unattributed:
+        impacted.update(coverage.keys())
+
+    return impacted, unattributed
+
+
+def get_minimal_subset(coverage, hpxmls=None, rb_lines=None):
+    """Greedily select a minimal subset of HPXML files that executes every line executed by the full set.
+
+    Args:
+        coverage: Per-HPXML coverage as returned by read_coverage()
+        hpxmls: Optional HPXML file names to select from (defaults to all)
+        rb_lines: Optional dict of Ruby file path => set of line numbers (or None for all lines) to
+                  restrict the lines to cover to (defaults to all)
+
+    Returns:
+        A list of HPXML file names, in the order they were selected.
+    """
+    if hpxmls is None:
+        hpxmls = coverage.keys()
+
+    # Convert (Ruby file, line) pairs to integer ids for fast set operations
+    line_ids = {}
+    hpxml_lines = {}
+    for hpxml in sorted(hpxmls):
+        if hpxml not in coverage:
+            continue  # e.g., new HPXML file
+        lines = set()
+        for rb_path, hpxml_rb_lines in coverage[hpxml].items():
+            if rb_lines is not None:
+                if rb_path not in rb_lines:
+                    continue
+                if rb_lines[rb_path] is not None:
+                    hpxml_rb_lines = hpxml_rb_lines & rb_lines[rb_path]
+            for line in hpxml_rb_lines:
+                lines.add(line_ids.setdefault((rb_path, line), len(line_ids)))
+        if lines:
+            hpxml_lines[hpxml] = lines
+
+    # Lazy greedy set cover; the number of uncovered lines an HPXML file adds can only
+    # decrease as others are selected, so stale heap entries are upper bounds.
+    heap = [(-len(lines), hpxml) for hpxml, lines in hpxml_lines.items()]
+    heapq.heapify(heap)
+    uncovered = set(line_ids.values())
+    subset = []
+    while heap and uncovered:
+        neg_gain, hpxml = heapq.heappop(heap)
+        gain = len(hpxml_lines[hpxml] & uncovered)
+        if gain == 0:
+            continue
+        if heap and gain < -heap[0][0]:
+            heapq.heappush(heap, (-gain, hpxml))
+            continue
+        subset.append(hpxml)
+        uncovered -= hpxml_lines[hpxml]
+
+    return subset
+
+
+if __name__ == '__main__':
+
+    default_coverage_folder = 'workflow/tests/coverage'
+    default_export_file = 'workflow/tests/test_subset.txt'
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-c', '--coverage_folder', default=default_coverage_folder, help='Path of the coverage folder.')
+    parser.add_argument('-e', '--export_file', default=default_export_file, help='Path of the subset file to export.')
+    parser.add_argument('-r', '--ref', help='Select HPXML files impacted by changes relative to this git ref.')
+    parser.add_argument('-m', '--modified_files', nargs='+', help='Select HPXML files impacted by these (repo-relative) modified files.')
+    parser.add_argument('-n', '--minimal', action='store_true', help='Reduce the selection to a minimal covering subset.')
+    parser.add_argument('-i', '--impact_map', help='Path of a JSON file to export the Ruby file => HPXML files mapping.')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.coverage_folder):
+        sys.exit("Coverage folder %s not found." % args.coverage_folder)
+
+    coverage = read_coverage(args.coverage_folder)
+
+    if args.impact_map:
+        with open(args.impact_map, 'w') as f:
+            json.dump(get_impact_map(coverage), f, indent=2)
+
+    changed_lines = None
+    if args.ref:
+        changed_lines = get_changed_lines(args.ref)
+    elif args.modified_files:
+        changed_lines = {f: None for f in args.modified_files}
+
+    if changed_lines is None:
+        subset = set(coverage.keys())
+        if args.minimal:
+            subset = set(get_minimal_subset(coverage))
+    else:
+        subset, unattributed = get_impacted_hpxmls(coverage, changed_lines)
+        for changed_file in unattributed:
+            print("Warning: %s cannot be attributed to specific HPXML files. Selecting all..." % changed_file)
+        if args.minimal and not unattributed:
+            # Only need to cover the changed lines of Ruby files; directly changed HPXML files are always kept
+            changed_hpxmls = {os.path.basename(f) for f in changed_lines if os.path.dirname(f) in HPXML_DIRS}
+            rb_lines = {f.replace('\\', '/'): lines for f, lines in changed_lines.items() if f.endswith('.rb')}
+            subset = set(get_minimal_subset(coverage, subset, rb_lines)) | (subset & changed_hpxmls)
+
+    with open(args.export_file, 'w') as f:
+        for hpxml in sorted(subset):
+            f.write(f'{hpxml}\n')
+
+    print("Selected %d of %d HPXML files; written to %s." % (len(subset), len(coverage), args.export_file))
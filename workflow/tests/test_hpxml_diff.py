@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from hpxml_diff import diff_hpxmls
+
+SAMPLE_FILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sample_files')
+NS = {'h': 'http://hpxmlonline.com/2025/12'}
+
+
+class TestHPXMLDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.base_path = os.path.join(SAMPLE_FILES_DIR, 'base.xml')
+        ET.register_namespace('', NS['h'])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _diff(self, modify):
+        tree = ET.parse(self.base_path)
+        modify(tree.getroot())
+        feature_path = os.path.join(self.tmp_dir, 'feature.xml')
+        tree.write(feature_path)
+        _, diffs = diff_hpxmls(('base.xml', self.base_path, feature_path, False))
+        return diffs
+
+    def _walls(self, root):
+        return root.find('.//h:Enclosure/h:Walls', NS)
+
+    def test_unchanged(self):
+        self.assertEqual([], self._diff(lambda root: None))
+
+    def test_value_change(self):
+        # Windows reference the changed wall, but only the wall's area is a difference
+        def modify(root):
+            self._walls(root).find('h:Wall/h:Area', NS).text = '1100.0'
+
+        diffs = self._diff(modify)
+        self.assertEqual(1, len(diffs))
+        self.assertEqual(('HPXML/Building[1]/BuildingDetails[1]/Enclosure[1]/Walls[1]/Wall[1]/Area[1]', 'changed', '1200.0', '1100.0'),
+                         diffs[0])
+
+    def test_reorder_and_rename(self):
+        def modify(root):
+            walls = self._walls(root)
+            wall1 = walls.find('h:Wall', NS)
+            walls.remove(wall1)
+            walls.append(wall1)
+            for elem in root.iter():
+                for k in ['id', 'idref']:
+                    if elem.get(k) == 'Wall1':
+                        elem.set(k, 'WallRenamed')
+
+        self.assertEqual([], self._diff(modify))
+
+    def test_reference_change(self):
+        def modify(root):
+            window = root.find('.//h:Windows/h:Window', NS)
+            window.find('h:AttachedToWall', NS).set('idref', 'Wall2')
+
+        diffs = self._diff(modify)
+        self.assertEqual(1, len(diffs))
+        path, change, base_value, feature_value = diffs[0]
+        self.assertTrue(path.endswith('/AttachedToWall[1]/@idref'))
+        self.assertEqual('changed', change)
+        self.assertEqual('HPXML/Building[1]/BuildingDetails[1]/Enclosure[1]/Walls[1]/Wall[1]', base_value)
+        self.assertEqual('HPXML/Building[1]/BuildingDetails[1]/Enclosure[1]/Walls[1]/Wall[2]', feature_value)
+
+
+if __name__ == '__main__':
+    unittest.main()
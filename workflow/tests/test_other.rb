@@ -154,6 +154,36 @@ class WorkflowOtherTest < Minitest::Test
     end
   end
 
+  def test_run_stochastic_occupancy_ensemble
+    # Check that multiple seeds of the same HPXML can be run concurrently without modifying the HPXML
+    py_path = File.join(File.dirname(__FILE__), '..', 'ensemble.py')
+    xml = File.absolute_path(File.join(File.dirname(__FILE__), '..', 'sample_files', 'base.xml'))
+    xml_contents = File.read(xml)
+    output_dir = File.join(File.dirname(__FILE__), 'test_ensemble')
+    FileUtils.rm_rf(output_dir)
+    command = "python \"#{py_path}\" -x \"#{xml}\" -o \"#{output_dir}\" -n 2 --min-seeds 2 --max-seeds 2 --openstudio \"#{OpenStudio.getOpenStudioCLI}\""
+    system(command)
+
+    # Check both seeds succeeded
+    [1, 2].each do |seed|
+      run_dir = File.join(output_dir, 'base', "seed#{seed}", 'run')
+      assert(File.exist? File.join(run_dir, 'results_annual.csv'))
+      assert(File.exist? File.join(run_dir, 'stochastic.csv'))
+    end
+    results = CSV.read(File.join(output_dir, 'ensemble_results.csv'), headers: true)
+    assert_equal(2, results.size)
+    summary = CSV.read(File.join(output_dir, 'ensemble_summary.csv'), headers: true)
+    assert_equal('2', summary[0]['Seeds'])
+    assert_equal('0', summary[0]['Failed Seeds'])
+
+    # Check the source HPXML is unchanged
+    assert_equal(xml_contents, File.read(xml))
+    refute(File.exist? xml.gsub('.xml', '_bak.xml'))
+
+    # Cleanup
+    FileUtils.rm_rf(output_dir)
+  end
+
   def test_run_simulation_timeseries_outputs
     [true, false].each do |invalid_variable_only|
       # Check that the simulation produces timeseries with requested outputs
@@ -239,6 +269,100 @@ class WorkflowOtherTest < Minitest::Test
     end
   end
 
+  def test_run_simulation_coverage
+    # Check that the simulation records the Ruby code executed if requested
+    require 'json'
+    rb_path = File.join(File.dirname(__FILE__), '..', 'run_simulation.rb')
+    xml = File.join(File.dirname(__FILE__), '..', 'sample_files', 'base.xml')
+    command = "\"#{OpenStudio.getOpenStudioCLI}\" \"#{rb_path}\" -x \"#{xml}\" --coverage"
+    system(command, err: File::NULL)
+
+    # Check for coverage file with repo-relative paths
+    run_dir = File.join(File.dirname(xml), 'run')
+    assert(File.exist? File.join(run_dir, 'results_annual.csv'))
+    coverage = JSON.parse(File.read(File.join(run_dir, 'coverage.json')))
+    assert_includes(coverage.keys, 'HPXMLtoOpenStudio/measure.rb')
+    assert_includes(coverage.keys, 'HPXMLtoOpenStudio/resources/hvac.rb')
+    assert_includes(coverage.keys, 'workflow/run_simulation.rb')
+    coverage.each do |path, lines|
+      refute(path.start_with?('/') || path.include?(':') || path.start_with?('..'))
+      assert(path.end_with? '.rb')
+      assert(lines.all? { |line| line.is_a?(Integer) && line > 0 })
+    end
+
+    # Check no coverage file if not requested
+    command = "\"#{OpenStudio.getOpenStudioCLI}\" \"#{rb_path}\" -x \"#{xml}\""
+    system(command, err: File::NULL)
+    refute(File.exist? File.join(run_dir, 'coverage.json'))
+  end
+
+  def test_run_simulation_tests_subset_and_coverage
+    # Check that the workflow tests can be restricted to a subset of HPXML files and record their coverage
+    sample_files_path = File.join(File.dirname(__FILE__), '..', 'sample_files')
+    xmls = ['base.xml', 'base-misc-defaults.xml'].map { |hpxml_name| File.absolute_path(File.join(sample_files_path, hpxml_name)) }
+    coverage_dir = File.join(File.dirname(__FILE__), 'test_coverage')
+    subset_path = File.join(coverage_dir, 'test_subset.txt')
+    FileUtils.rm_rf(coverage_dir)
+    FileUtils.mkdir_p(coverage_dir)
+    File.write(subset_path, "base.xml\n")
+
+    begin
+      ENV['COVERAGE_DIR'] = coverage_dir
+      ENV['TEST_SUBSET'] = subset_path
+      all_annual_results = run_simulation_tests(xmls)
+    ensure
+      ENV.delete('COVERAGE_DIR')
+      ENV.delete('TEST_SUBSET')
+    end
+
+    assert_equal(['base.xml'], all_annual_results.keys)
+    assert(File.exist? File.join(coverage_dir, 'base.json'))
+    assert(File.exist? File.join(coverage_dir, 'base-10x.json'))
+    refute(File.exist? File.join(coverage_dir, 'base-misc-defaults.json'))
+
+    # Cleanup
+    FileUtils.rm_rf(coverage_dir)
+  end
+
+  def test_run_simulation_worker
+    # Check that a single worker process can run multiple jobs, including a failing one
+    require 'json'
+    require 'open3'
+    rb_path = File.join(File.dirname(__FILE__), '..', 'run_simulation.rb')
+    xml = File.absolute_path(File.join(File.dirname(__FILE__), '..', 'sample_files', 'base.xml'))
+    output_dir = File.absolute_path(File.join(File.dirname(__FILE__), 'test_worker'))
+    FileUtils.rm_rf(output_dir)
+    jobs = [{ 'id' => 0, 'hpxml' => xml, 'output_dir' => File.join(output_dir, 'job0') },
+            { 'id' => 1, 'hpxml' => File.join(output_dir, 'missing.xml'), 'output_dir' => File.join(output_dir, 'job1') },
+            { 'id' => 2, 'hpxml' => xml, 'output_dir' => File.join(output_dir, 'job2'), 'skip_simulation' => true }]
+
+    responses = []
+    Open3.popen2("\"#{OpenStudio.getOpenStudioCLI}\" \"#{rb_path}\" --worker", err: File::NULL) do |stdin, stdout, _wait_thr|
+      assert_equal({ 'ready' => true }, JSON.parse(stdout.gets))
+      jobs.each do |job|
+        stdin.puts(JSON.generate(job))
+        responses << JSON.parse(stdout.gets)
+      end
+      stdin.close
+    end
+
+    # Check responses
+    assert_equal([0, 1, 2], responses.map { |response| response['id'] })
+    assert_equal([true, false, true], responses.map { |response| response['success'] })
+    assert_includes(responses[1]['error'], 'does not exist')
+    [0, 2].each do |i|
+      run_dir = File.join(output_dir, "job#{i}", 'run')
+      assert_equal(run_dir, responses[i]['run_dir'])
+      assert(File.exist? File.join(run_dir, 'in.xml'))
+      assert(File.exist? File.join(run_dir, 'results_annual.csv'))
+    end
+    assert(File.exist? File.join(output_dir, 'job0', 'run', 'results_bills.csv'))
+    refute(File.exist? File.join(output_dir, 'job2', 'run', 'in.idf'))
+
+    # Cleanup
+    FileUtils.rm_rf(output_dir)
+  end
+
   def test_run_simulation_skip_simulation
     # Check that we can correctly skip the EnergyPlus simulation and reporting measures
     rb_path = File.join(File.dirname(__FILE__), '..', 'run_simulation.rb')
@@ -0,0 +1,82 @@
+import unittest
+
+from select_tests import get_impacted_hpxmls, get_minimal_subset, parse_changed_lines
+
+DIFF = '''diff --git a/HPXMLtoOpenStudio/resources/hvac.rb b/HPXMLtoOpenStudio/resources/hvac.rb
+index 1111111..2222222 100644
+--- a/HPXMLtoOpenStudio/resources/hvac.rb
++++ b/HPXMLtoOpenStudio/resources/hvac.rb
+@@ -10,2 +10,2 @@ def self.apply
+-    a = 1
+--- b = 2
++    a = 2
++    b = 3
+@@ -20,0 +21,3 @@ def self.apply
++    c = 1
++    d = 2
++    e = 3
+@@ -30 +33,0 @@ def self.apply
+-    f = 1
+diff --git a/HPXMLtoOpenStudio/resources/new.rb b/HPXMLtoOpenStudio/resources/new.rb
+new file mode 100644
+index 0000000..3333333
+--- /dev/null
++++ b/HPXMLtoOpenStudio/resources/new.rb
+@@ -0,0 +1,2 @@
++# frozen_string_literal: true
++
+diff --git a/HPXMLtoOpenStudio/resources/old.rb b/HPXMLtoOpenStudio/resources/old.rb
+deleted file mode 100644
+index 4444444..0000000
+--- a/HPXMLtoOpenStudio/resources/old.rb
++++ /dev/null
+@@ -1,2 +0,0 @@
+-# frozen_string_literal: true
+-
+diff --git a/weather/USA_CO.epw b/weather/USA_CO.epw
+index 5555555..6666666 100644
+Binary files a/weather/USA_CO.epw and b/weather/USA_CO.epw differ
+'''
+
+COVERAGE = {'base.xml': {'HPXMLtoOpenStudio/resources/hvac.rb': {1, 2, 3, 10},
+                         'HPXMLtoOpenStudio/resources/pv.rb': {1}},
+            'base-hvac.xml': {'HPXMLtoOpenStudio/resources/hvac.rb': {1, 2, 3, 20, 21, 30}},
+            'base-pv.xml': {'HPXMLtoOpenStudio/resources/hvac.rb': {1, 2, 10},
+                            'HPXMLtoOpenStudio/resources/pv.rb': {1, 2, 3}}}
+
+
+class TestSelectTests(unittest.TestCase):
+
+    def test_parse_changed_lines(self):
+        changed = parse_changed_lines(DIFF)
+        self.assertEqual({'HPXMLtoOpenStudio/resources/hvac.rb': {10, 11, 20, 21, 30},
+                          'HPXMLtoOpenStudio/resources/new.rb': None,
+                          'HPXMLtoOpenStudio/resources/old.rb': {1, 2},
+                          'weather/USA_CO.epw': None}, changed)
+
+    def test_impacted_hpxmls(self):
+        impacted, unattributed = get_impacted_hpxmls(COVERAGE, {'HPXMLtoOpenStudio/resources/hvac.rb': {20},
+                                                                'HPXMLtoOpenStudio/tests/test_hvac.rb': None,
+                                                                'workflow/sample_files/base-foo.xml': None})
+        self.assertEqual({'base-hvac.xml', 'base-foo.xml'}, impacted)
+        self.assertEqual([], unattributed)
+
+        impacted, _ = get_impacted_hpxmls(COVERAGE, {'HPXMLtoOpenStudio/resources/pv.rb': None})
+        self.assertEqual({'base.xml', 'base-pv.xml'}, impacted)
+
+    def test_impacted_hpxmls_unattributed(self):
+        for changed_file in ['workflow/tests/util.rb', 'weather/USA_CO.epw']:
+            impacted, unattributed = get_impacted_hpxmls(COVERAGE, {changed_file: None})
+            self.assertEqual(set(COVERAGE.keys()), impacted)
+            self.assertEqual([changed_file], unattributed)
+
+    def test_minimal_subset(self):
+        # base-hvac.xml covers the most lines, then base-pv.xml covers the remaining lines (so base.xml isn't needed)
+        self.assertEqual(['base-hvac.xml', 'base-pv.xml'], get_minimal_subset(COVERAGE))
+        self.assertEqual(['base-pv.xml'], get_minimal_subset(COVERAGE, rb_lines={'HPXMLtoOpenStudio/resources/pv.rb': None}))
+        self.assertEqual(['base.xml'], get_minimal_subset(COVERAGE, ['base.xml', 'base-hvac.xml'],
+                                                          {'HPXMLtoOpenStudio/resources/hvac.rb': {10}}))
+
+
+if __name__ == '__main__':
+    unittest.main()
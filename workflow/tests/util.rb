@@ -3,6 +3,13 @@
 require 'csv'
 
 def run_simulation_tests(xmls)
+  # Optionally restrict to the subset of HPXML files listed (one file name per line) in
+  # the TEST_SUBSET file, e.g. as generated by select_tests.py
+  if not ENV['TEST_SUBSET'].nil?
+    subset = File.readlines(ENV['TEST_SUBSET']).map(&:strip).reject(&:empty?)
+    xmls = xmls.select { |xml| subset.include? File.basename(xml) }
+  end
+
   # Run simulations
   puts "Running #{xmls.size} HPXML files..."
   all_annual_results = {}
@@ -87,7 +94,11 @@ def _run_xml(xml, worker_num, apply_unit_multiplier = false, annual_results_1x =
   cli_path = OpenStudio.getOpenStudioCLI
   building_id_str = ' --building-id MyBuilding_AlternativeDesign' if xml.include? 'base-misc-multiple-buildings.xml'
   skip_validation_str = ' --skip-validation' if skip_validation
-  command = "\"#{cli_path}\" \"#{File.join(File.dirname(__FILE__), '../run_simulation.rb')}\" -x \"#{xml}\" --add-component-loads -o \"#{rundir}\" --debug --monthly ALL#{building_id_str}#{skip_validation_str}"
+  # Optionally record the Ruby code executed for each HPXML file in the COVERAGE_DIR directory
+  coverage_dir = ENV['COVERAGE_DIR']
+  coverage_str = ' --coverage' unless coverage_dir.nil?
+  coverage_name = File.basename(xml, '.xml')
+  command = "\"#{cli_path}\" \"#{File.join(File.dirname(__FILE__), '../run_simulation.rb')}\" -x \"#{xml}\" --add-component-loads -o \"#{rundir}\" --debug --monthly ALL#{building_id_str}#{skip_validation_str}#{coverage_str}"
   success = system(command)
 
   if unit_multiplier > 1
@@ -102,6 +113,11 @@ def _run_xml(xml, worker_num, apply_unit_multiplier = false, annual_results_1x =
   print "Simulation failed: #{xml}.\n" unless success
   assert_equal(true, success)
 
+  if not coverage_dir.nil?
+    FileUtils.mkdir_p(coverage_dir)
+    FileUtils.cp(File.join(rundir, 'coverage.json'), File.join(coverage_dir, "#{coverage_name}.json"))
+  end
+
   # Check for output files
   annual_csv_path = File.join(rundir, 'results_annual.csv')
   monthly_csv_path = File.join(rundir, 'results_timeseries.csv')
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Script to run many HPXML files through a pool of persistent run_simulation.rb workers.
+Each worker (`openstudio run_simulation.rb --worker`) loads the measures, resource files,
+and schema/Schematron validators once and then runs jobs sent to it as JSON lines on stdin,
+avoiding the OpenStudio/Ruby startup cost of a separate run_simulation.rb call per HPXML.
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+import subprocess
+
+
+def get_failed_response(job, error):
+    return {'id': job.get('id'), 'success': False, 'run_dir': None, 'error': error}
+
+
+class Worker:
+    def __init__(self, openstudio, log_path=None):
+        """Start a run_simulation.rb worker process and wait for it to be ready.
+
+        Args:
+            openstudio: Path to the OpenStudio CLI
+            log_path: Optional path to write the worker's workflow output to (default: discarded)
+        """
+        self.openstudio = openstudio
+        self.log_path = log_path
+        self.log = open(log_path, 'a') if log_path else subprocess.DEVNULL
+        run_simulation_rb = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run_simulation.rb')
+        self.process = subprocess.Popen(
+            [openstudio, run_simulation_rb, '--worker'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self.log,
+            text=True,
+            bufsize=1
+        )
+        response = self._read_response()
+        if response is None or not response.get('ready'):
+            self.close()
+            raise RuntimeError("Worker failed to start; see %s for details." % (log_path or 'the worker output'))
+
+    def _read_response(self):
+        line = self.process.stdout.readline()
+        if not line:
+            return None  # Worker exited
+        return json.loads(line)
+
+    def run(self, job):
+        """Run a job (dict of run_simulation.rb options, see run_worker) and return the response dict."""
+        try:
+            self.process.stdin.write(json.dumps(job) + '\n')
+            self.process.stdin.flush()
+            response = self._read_response()
+        except (OSError, ValueError):
+            response = None  # Worker already exited (broken pipe or closed stdin) or wrote an invalid response
+        if response is None:
+            self.process.wait()
+            return get_failed_response(job, 'Worker exited unexpectedly.')
+        return response
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        if self.process.stdin and not self.process.stdin.closed:
+            self.process.stdin.close()
+        self.process.wait()
+        if self.log is not subprocess.DEVNULL:
+            self.log.close()
+
+
+class WorkerPool:
+    def __init__(self, num_workers, openstudio='openstudio', log_dir=None):
+        """Start a pool of run_simulation.rb workers.
+
+        Args:
+            num_workers: Number of worker processes
+            openstudio: Path to the OpenStudio CLI
+            log_dir: Optional directory to write each worker's workflow output to
+        """
+        self.openstudio = openstudio
+        self.log_dir = log_dir
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        self.workers = [self._start_worker(i) for i in range(num_workers)]
+
+    def _start_worker(self, i):
+        log_path = os.path.join(self.log_dir, f'worker{i}.log') if self.log_dir else None
+        return Worker(self.openstudio, log_path)
+
+    def run(self, jobs, callback=None):
+        """Run jobs across the workers.
+
+        Args:
+            jobs: List of job dicts; each requires 'hpxml' and may include 'output_dir' and any of
+                  the run_simulation.rb options (e.g., 'skip_simulation', 'hourly', 'output_format')
+            callback: Optional function called with each response as it completes
+
+        Returns:
+            A list of response dicts (id, success, run_dir, error, elapsed) in the same order as jobs
+        """
+        jobs = [dict(job, id=job.get('id', i)) for i, job in enumerate(jobs)]
+        indexes = {id(job): i for i, job in enumerate(jobs)}
+        remaining = iter(jobs)
+        responses = [None] * len(jobs)
+
+        def next_job():
+            return next(remaining, None)
+
+        def on_response(job, response):
+            responses[indexes[id(job)]] = response
+            if callback:
+                callback(response)
+
+        self.run_dynamic(next_job, on_response)
+        return [response if response is not None else get_failed_response(job, 'Not run; no workers available.')
+                for job, response in zip(jobs, responses)]
+
+    def run_dynamic(self, next_job, callback):
+        """Run jobs across the workers, where the jobs to run can depend on the responses so far.
+
+        Args:
+            next_job: Function called whenever a worker is free; returns a job dict, or None if there is
+                      no job to run. If None is returned while other jobs are running, the worker waits for
+                      one of them to complete and then calls next_job again; otherwise, the worker stops.
+            callback: Function called with each (job, response) as it completes
+
+        next_job and callback are never called concurrently, so they can share state without locking.
+        """
+        condition = threading.Condition()
+        num_running = [0]
+
+        def work(worker_index):
+            while True:
+                with condition:
+                    job = next_job()
+                    while job is None and num_running[0] > 0:
+                        condition.wait()
+                        job = next_job()
+                    if job is None:
+                        condition.notify_all()
+                        return
+                    num_running[0] += 1
+                response = None
+                try:
+                    response = self.workers[worker_index].run(job)
+                    if not self.workers[worker_index].is_alive():
+                        # Replace crashed worker so remaining jobs can proceed
+                        self.workers[worker_index].close()
+                        self.workers[worker_index] = self._start_worker(worker_index)
+                except Exception as e:
+                    if response is None:
+                        response = get_failed_response(job, str(e))
+                    return  # Worker could not be restarted; the remaining workers run the remaining jobs
+                finally:
+                    with condition:
+                        num_running[0] -= 1
+                        callback(job, response)
+                        condition.notify_all()
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(len(self.workers))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def main():
+    """Main function to run HPXML files through a pool of workers."""
+    parser = argparse.ArgumentParser(description='Run HPXML files using a pool of persistent run_simulation.rb workers')
+    parser.add_argument('-x', '--xml', dest='hpxmls', nargs='+', required=True, help='HPXML files')
+    parser.add_argument('-o', '--output-dir', help='Output directory; each HPXML is run in <output-dir>/<HPXML name> (default: next to each HPXML)')
+    parser.add_argument('-n', '--num-workers', type=int, default=os.cpu_count(), help='Number of workers (default: number of CPUs)')
+    parser.add_argument('--openstudio', default='openstudio', help='Path to the OpenStudio CLI (default: openstudio)')
+    parser.add_argument('--log-dir', help='Directory to write worker output to')
+    parser.add_argument('--skip-simulation', action='store_true', help='Skip the EnergyPlus simulation')
+    parser.add_argument('--skip-validation', action='store_true', help='Skip Schema/Schematron validation')
+    parser.add_argument('--output-format', default='csv', choices=['csv', 'json', 'msgpack', 'csv_dview'], help='Output file format type')
+    parser.add_argument('--hourly', action='append', default=[], help='Request hourly output category; can be called multiple times')
+    parser.add_argument('--daily', action='append', default=[], help='Request daily output category; can be called multiple times')
+    parser.add_argument('--monthly', action='append', default=[], help='Request monthly output category; can be called multiple times')
+    parser.add_argument('--timestep', action='append', default=[], help='Request timestep output category; can be called multiple times')
+    args = parser.parse_args()
+
+    jobs = []
+    for hpxml in args.hpxmls:
+        job = {'hpxml': os.path.abspath(hpxml),
+               'skip_simulation': args.skip_simulation,
+               'skip_validation': args.skip_validation,
+               'output_format': args.output_format,
+               'hourly': args.hourly,
+               'daily': args.daily,
+               'monthly': args.monthly,
+               'timestep': args.timestep}
+        if args.output_dir:
+            job['output_dir'] = os.path.join(os.path.abspath(args.output_dir), os.path.splitext(os.path.basename(hpxml))[0])
+        jobs.append(job)
+
+    def report(response):
+        hpxml = jobs[response['id']]['hpxml']
+        status = 'Completed' if response['success'] else 'FAILED'
+        print(f"{status}: {hpxml} ({response.get('elapsed', 0)}s)")
+        if response.get('error'):
+            print(f"  {response['error']}")
+
+    with WorkerPool(min(args.num_workers, len(jobs)), args.openstudio, args.log_dir) as pool:
+        responses = pool.run(jobs, report)
+
+    num_failed = sum(1 for response in responses if not response['success'])
+    print(f"{len(responses) - num_failed}/{len(responses)} HPXML files completed successfully.")
+    sys.exit(1 if num_failed > 0 else 0)
+
+
+if __name__ == "__main__":
+    main()